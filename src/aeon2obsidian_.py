@@ -1,44 +1,532 @@
 #!/usr/bin/python3
 """Convert Aeon Timeline 2 project data to Obsidian Markdown fileset. 
 
-usage: aeon2obsidian.py Sourcefile
+usage: aeon2obsidian.py [-h] [--no-streaming] [--incremental] [--workers N]
+                        [--processes N] [--merge FOLDER] [--watch]
+                        [--debounce SECONDS] [--poll] [--compact] [--stats]
+                        [--trace FILE] [--profile FILE] [--batch-dates]
+                        [--cache [DIR]] [--cache-size MIB] [--archive FILE]
+                        [--dry-run] [--diff] [--snapshot]
+                        [--restore [SNAPSHOT]] [--table {csv,parquet,arrow}]
+                        [--layout {flat,type,year,hash}] [--page-size N]
+                        [--frontmatter] [--tag TAG] [--type NAME]
+                        [--entity ENTITY] [--property NAME] [--from DATE]
+                        [--to DATE]
+                        Sourcefile [Sourcefile ...]
 
 positional arguments:
-  Sourcefile  The path of the .aeonzip file.
+  Sourcefile            The path of the .aeonzip file. Multiple files,
+                        directories, or glob patterns start a batch
+                        conversion.
+
+options:
+  -h, --help            show this help message and exit
+  --no-streaming        Load the whole timeline at once instead of streaming
+                        it.
+  --incremental         Only rewrite notes whose content has changed.
+  --workers N           Number of threads rendering and writing the notes.
+  --processes N         Number of projects converted concurrently in batch
+                        mode, or read concurrently with --merge. Default:
+                        number of CPUs.
+  --merge FOLDER        Convert all source files into a single Obsidian
+                        folder, with one note per entity shared by the
+                        projects.
+  --watch               Keep running and export again whenever the source file
+                        changes.
+  --debounce SECONDS    Seconds the source file must stay unchanged before
+                        exporting in watch mode. Default: 2.
+  --poll                Check the source file periodically instead of using
+                        inotify in watch mode.
+  --compact             Use memory saving data structures for large timelines.
+  --stats               Print timings and counters of the conversion stages.
+  --trace FILE          Write timings and counters of the conversion stages to
+                        a JSON file.
+  --profile FILE        Write cProfile statistics to a file.
+  --batch-dates         Calculate the dates of all events at once, using NumPy
+                        if installed.
+  --cache [DIR]         Keep parsed timelines in a cache directory and reuse
+                        them while the source file is unchanged. Default
+                        directory: the user cache directory.
+  --cache-size MIB      Maximum size of the parse cache in MiB. Default: 256.
+  --archive FILE        Write a .zip, .tar, or .tar.gz vault archive instead
+                        of the Obsidian folder. "-" writes a tar.gz archive to
+                        the standard output.
+  --dry-run             List the notes that would be created, changed, or
+                        removed, without writing.
+  --diff                With --dry-run: show the changes of each note.
+  --snapshot            Replace the notes all at once when the export is
+                        complete, and save the previous notes in a compressed
+                        snapshot instead of .bak files.
+  --restore [SNAPSHOT]  Put back the notes saved in a snapshot instead of
+                        exporting. Default: the latest snapshot.
+  --table {csv,parquet,arrow}
+                        Also write the events with their roles, tags, and
+                        property values as a table next to the Obsidian
+                        folder. Parquet and Arrow require PyArrow.
+  --layout {flat,type,year,hash}
+                        Put the notes into subfolders by entity type, by event
+                        year, or by hash prefix. Default: flat.
+  --page-size N         Split index notes into pages of at most N links.
+  --frontmatter         Write the event data as YAML frontmatter for Dataview,
+                        and all events to a JSON dataset.
+  --tag TAG             Only export events with this tag. Can be repeated.
+  --type NAME           Only export entities of this type. Entities are not
+                        filtered by the other criteria. Can be repeated.
+  --entity ENTITY       Only export events related to the entity with this
+                        name or GUID. Can be repeated.
+  --property NAME       Only export events with a value for this property. Can
+                        be repeated.
+  --from DATE           Only export events starting on or after this ISO date
+                        (YYYY-MM-DD).
+  --to DATE             Only export events starting on or before this ISO date
+                        (YYYY-MM-DD).
 
 Copyright (c) 2024 Peter Triesberger
 For further information see https://github.com/peter88213/aeon2obsidian
 Published under the MIT License (https://opensource.org/licenses/mit-license.php)
 """
+import argparse
+from contextlib import redirect_stdout
+from functools import partial
 import os
 import sys
 from aeon2obsidianlib.aeon2_file import Aeon2File
+from aeon2obsidianlib.archive_sink import ArchiveSink
+from aeon2obsidianlib.batch_converter import BatchConverter
+from aeon2obsidianlib.batch_converter import collect_sources
+from aeon2obsidianlib.column_export import ColumnExport
+from aeon2obsidianlib.column_export import import_pyarrow
+from aeon2obsidianlib.compact_entity import CompactEntity
+from aeon2obsidianlib.compact_event import CompactEvent
+from aeon2obsidianlib.dry_run_sink import DryRunSink
+from aeon2obsidianlib.export_filter import ExportFilter
+from aeon2obsidianlib.file_watcher import FileWatcher
+from aeon2obsidianlib.frontmatter_files import FrontmatterFiles
+from aeon2obsidianlib.instrumentation import instrumentation
+from aeon2obsidianlib.link_index import LinkIndex
 from aeon2obsidianlib.obsidian_files import ObsidianFiles
+from aeon2obsidianlib.parse_cache import ParseCache
+from aeon2obsidianlib.parse_cache import get_default_cache_dir
+from aeon2obsidianlib.snapshot_sink import SnapshotSink
 from aeon2obsidianlib.timeline import Timeline
+from aeon2obsidianlib.timeline_merger import TimelineMerger
+
+
+def main(sourcePath, streaming=True, incremental=False, workers=1, compact=False, batchDates=False,
+         cacheDir=None, cacheSize=256, layout='flat', pageSize=0, archivePath=None, dryRun=False, showDiff=False,
+         exportFilter=None, frontmatter=False, snapshot=False, tableFormat=None):
+    """Convert an .aeonzip source file to a set of Markdown files.
+    
+    Positional arguments:
+        sourcePath -- str: The path of the .aeonzip file.
+
+    Optional arguments:
+        streaming -- bool: If False, load the whole timeline at once.
+        incremental -- bool: If True, only rewrite notes whose content has changed.
+        workers -- int: Number of threads rendering and writing the notes.
+        compact -- bool: If True, use the memory saving entity and event classes.
+        batchDates -- bool: If True, calculate the dates of all events at once.
+        cacheDir -- str: If set, keep parsed timelines in this directory for reuse.
+        cacheSize -- int: Maximum size of the parse cache in MiB.
+        layout -- str: Subfolder layout of the notes; one of LinkIndex.LAYOUTS.
+        pageSize -- int: Maximum number of links per index page; 0 means no limit.
+        archivePath -- str: If set, write a zip or tar vault archive instead of the Obsidian folder.
+                            "-" means the standard output; then, messages go to stderr.
+        dryRun -- bool: If True, report the differences to the Obsidian folder instead of writing.
+        showDiff -- bool: If True, add the changes of each note to the dry run report.
+        exportFilter -- ExportFilter: If set, only export the entities and events it accepts.
+        frontmatter -- bool: If True, write the event data as YAML frontmatter, and a JSON dataset.
+        snapshot -- bool: If True, replace the notes all at once, saving the previous ones in a snapshot.
+        tableFormat -- str: If set, also write the events as a table next to the Obsidian folder;
+                            one of ColumnExport.FORMATS.
+    """
+    with redirect_stdout(sys.stderr if archivePath == ArchiveSink.STDOUT else sys.stdout):
+        for message in convert(sourcePath, streaming=streaming, incremental=incremental, workers=workers,
+                               compact=compact, batchDates=batchDates, cacheDir=cacheDir, cacheSize=cacheSize,
+                               layout=layout, pageSize=pageSize, archivePath=archivePath, dryRun=dryRun,
+                               showDiff=showDiff, exportFilter=exportFilter, frontmatter=frontmatter,
+                               snapshot=snapshot, tableFormat=tableFormat):
+            print(message)
 
 
-def main(sourcePath):
+def batch(patterns, processes=None, **options):
+    """Convert many .aeonzip source files concurrently and print a summary.
+    
+    Positional arguments:
+        patterns -- list: Paths of .aeonzip files or directories, or glob patterns.
+
+    Optional arguments:
+        processes -- int: Number of worker processes. Default: number of CPUs.
+        options -- Keyword arguments passed to convert().
+    
+    Return the number of failed conversions.
+    """
+    sourcePaths = collect_sources(patterns)
+    if not sourcePaths:
+        print('No project files found.')
+        return 0
+
+    batchConverter = BatchConverter(partial(convert, **options), processes)
+    print(batchConverter.run(sourcePaths))
+    return batchConverter.failed
+
+
+def convert(sourcePath, streaming=True, incremental=False, workers=1, compact=False, batchDates=False,
+            cacheDir=None, cacheSize=256, exportFilter=None, **options):
     """Convert an .aeonzip source file to a set of Markdown files.
     
     Positional arguments:
         sourcePath -- str: The path of the .aeonzip file.
+
+    Optional arguments: see main().
+
+    Return a list of messages.
     """
+    aeon2File = create_aeon2_file(sourcePath, streaming=streaming, compact=compact, batchDates=batchDates,
+                                  cacheDir=cacheDir, cacheSize=cacheSize, exportFilter=exportFilter)
+    messages = [aeon2File.read()]
+    messages.extend(write_vault(aeon2File.timeline, get_obsidian_folder(sourcePath), incremental=incremental,
+                                workers=workers, **options))
+    return messages
+
 
-    # Create an Aeon 2 file object and read the data.
+def create_aeon2_file(sourcePath, streaming=True, compact=False, batchDates=False, cacheDir=None, cacheSize=256,
+                      exportFilter=None):
+    """Return an Aeon2File instance for reading a source file into a new timeline; arguments: see main()."""
     aeon2File = Aeon2File(sourcePath)
-    aeon2File.timeline = Timeline()
-    print(aeon2File.read())
+    aeon2File.timeline = create_timeline(compact)
+    aeon2File.streaming = streaming
+    aeon2File.batchDates = batchDates
+    aeon2File.exportFilter = exportFilter
+    if cacheDir:
+        aeon2File.parseCache = ParseCache(cacheDir, cacheSize * 1024 * 1024)
+    return aeon2File
+
+
+def create_column_export(obsidianFolder, tableFormat, timeline):
+    """Return a ColumnExport instance writing the timeline to a table file next to the Obsidian folder."""
+    columnExport = ColumnExport(f'{obsidianFolder}.{tableFormat}', tableFormat)
+    columnExport.timeline = timeline
+    return columnExport
+
+
+def create_obsidian_files(obsidianFolder, frontmatter=False):
+    """Return an ObsidianFiles instance, writing YAML frontmatter if frontmatter is True."""
+    if frontmatter:
+        return FrontmatterFiles(obsidianFolder)
+
+    return ObsidianFiles(obsidianFolder)
+
+
+def create_timeline(compact=False):
+    """Return a Timeline instance, using the memory saving classes if compact is True."""
+    timeline = Timeline()
+    if compact:
+        timeline.entityClass = CompactEntity
+        timeline.eventClass = CompactEvent
+    return timeline
 
-    # Define the output directory.
+
+def get_obsidian_folder(sourcePath):
+    """Return the output directory, named after the project."""
     aeonDir, aeonFilename = os.path.split(sourcePath)
     projectName = os.path.splitext(aeonFilename)[0]
-    obsidianFolder = os.path.join(aeonDir, projectName)
+    return os.path.join(aeonDir, projectName)
+
+
+def merge(patterns, vaultPath, processes=None, streaming=True, compact=False, batchDates=False, cacheDir=None,
+          cacheSize=256, exportFilter=None, **options):
+    """Convert several .aeonzip source files to a single set of Markdown files.
+    
+    Positional arguments:
+        patterns -- list: Paths of .aeonzip files or directories, or glob patterns.
+        vaultPath -- str: The path of the Obsidian folder.
+
+    Optional arguments:
+        processes -- int: Number of projects read concurrently. Default: number of CPUs.
+        streaming, compact, batchDates, cacheDir, cacheSize, exportFilter -- see main().
+        options -- Keyword arguments passed to write_vault().
+    
+    Entities, types, roles, and properties shared by the projects get a single note or name.
+    """
+    with redirect_stdout(sys.stderr if options.get('archivePath', None) == ArchiveSink.STDOUT else sys.stdout):
+        sourcePaths = collect_sources(patterns)
+        if not sourcePaths:
+            print('No project files found.')
+            return
+
+        timelineMerger = TimelineMerger(create_timeline(compact))
+        readTimeline = partial(read_timeline, streaming=streaming, compact=compact, batchDates=batchDates,
+                               cacheDir=cacheDir, cacheSize=cacheSize, exportFilter=exportFilter)
+        print(timelineMerger.read(sourcePaths, readTimeline, processes))
+        for message in write_vault(timelineMerger.timeline, vaultPath, **options):
+            print(message)
+
+
+def read_timeline(sourcePath, **options):
+    """Read an .aeonzip source file and return the Timeline instance; options: see create_aeon2_file()."""
+    aeon2File = create_aeon2_file(sourcePath, **options)
+    aeon2File.read()
+    return aeon2File.timeline
+
+
+def restore(obsidianFolder, snapshotPath=None):
+    """Put back the notes replaced by an export with snapshot.
+    
+    Positional arguments:
+        obsidianFolder -- str: The path of the Obsidian folder.
+
+    Optional arguments:
+        snapshotPath -- str: Path of the snapshot. Default: the latest snapshot of the Obsidian folder.
+    """
+    print(SnapshotSink(obsidianFolder).restore(snapshotPath))
+
+
+def run_instrumented(function, *args, stats=False, traceFile=None, profileFile=None, **kwargs):
+    """Call a function, collecting metrics and profiling data as requested.
+    
+    Positional arguments:
+        function -- The function to call with args and kwargs.
+
+    Optional arguments:
+        stats -- bool: If True, print the collected metrics.
+        traceFile -- str: Path of a JSON file for the collected metrics.
+        profileFile -- str: Path of a file for cProfile statistics.
+    """
+    instrumentation.enabled = stats or traceFile is not None
+    profiler = None
+    if profileFile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        return function(*args, **kwargs)
+
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profileFile)
+        if traceFile:
+            instrumentation.write_trace(traceFile)
+        if stats:
+            print(instrumentation.get_report())
+
+
+def watch(sourcePath, streaming=True, workers=1, compact=False, batchDates=False, layout='flat', pageSize=0,
+          exportFilter=None, frontmatter=False, snapshot=False, tableFormat=None, debounce=2.0, polling=False,
+          **options):
+    """Convert an .aeonzip source file, and again whenever it changes.
+    
+    Positional arguments:
+        sourcePath -- str: The path of the .aeonzip file.
+
+    Optional arguments:
+        streaming, workers, compact, batchDates, layout, pageSize, exportFilter, frontmatter,
+        snapshot, tableFormat -- see main().
+        debounce -- float: Seconds the file must stay unchanged before exporting.
+        polling -- bool: If True, check the file periodically instead of using inotify.
+    
+    The parsed events are kept between the runs, and only changed notes are rewritten.
+    Run until interrupted.
+    """
+    aeon2File = Aeon2File(sourcePath)
+    aeon2File.streaming = streaming
+    aeon2File.reuseEvents = True
+    aeon2File.batchDates = batchDates
+    aeon2File.exportFilter = exportFilter
+    obsidianFolder = get_obsidian_folder(sourcePath)
+    obsidianFiles = create_obsidian_files(obsidianFolder, frontmatter)
+    if snapshot:
+        obsidianFiles.sink = SnapshotSink(obsidianFolder)
+    obsidianFiles.incremental = True
+    obsidianFiles.workers = workers
+    obsidianFiles.layout = layout
+    obsidianFiles.pageSize = pageSize
+
+    def export():
+        aeon2File.timeline = create_timeline(compact)
+        print(aeon2File.read())
+        obsidianFiles.timeline = aeon2File.timeline
+        message = obsidianFiles.write()
+        if obsidianFiles.collisionReport:
+            print(obsidianFiles.collisionReport)
+        print(message)
+        if tableFormat:
+            print(create_column_export(obsidianFolder, tableFormat, aeon2File.timeline).write())
+
+    export()
+    fileWatcher = FileWatcher(sourcePath, export, debounce)
+    fileWatcher.polling = fileWatcher.polling or polling
+    print(f'Watching "{os.path.normpath(sourcePath)}". Press Ctrl-C to stop.')
+    try:
+        fileWatcher.run()
+    except KeyboardInterrupt:
+        pass
+
+
+def write_vault(timeline, obsidianFolder, incremental=False, workers=1, layout='flat', pageSize=0,
+                archivePath=None, dryRun=False, showDiff=False, frontmatter=False, snapshot=False,
+                tableFormat=None):
+    """Write a timeline to a set of Markdown files.
+    
+    Positional arguments:
+        timeline -- Timeline: The timeline to write.
+        obsidianFolder -- str: The path of the Obsidian folder.
+
+    Optional arguments: see main().
+
+    Return a list of messages.
+    """
+    messages = []
 
     # Create an Obsidian fileset object and write the data.
-    obsidianFiles = ObsidianFiles(obsidianFolder)
-    obsidianFiles.timeline = aeon2File.timeline
-    print(obsidianFiles.write())
+    obsidianFiles = create_obsidian_files(obsidianFolder, frontmatter)
+    if archivePath:
+        obsidianFiles.sink = ArchiveSink(archivePath, os.path.basename(obsidianFolder))
+    elif dryRun:
+        obsidianFiles.sink = DryRunSink(obsidianFolder)
+        obsidianFiles.sink.showDiff = showDiff
+    elif snapshot:
+        obsidianFiles.sink = SnapshotSink(obsidianFolder)
+    obsidianFiles.timeline = timeline
+    obsidianFiles.incremental = incremental
+    obsidianFiles.workers = workers
+    obsidianFiles.layout = layout
+    obsidianFiles.pageSize = pageSize
+    message = obsidianFiles.write()
+    if obsidianFiles.collisionReport:
+        messages.append(obsidianFiles.collisionReport)
+    messages.append(message)
+
+    # Write the same timeline as a table.
+    if tableFormat:
+        messages.append(create_column_export(obsidianFolder, tableFormat, timeline).write())
+    return messages
 
 
 if __name__ == '__main__':
-    main(sys.argv[1])
+    parser = argparse.ArgumentParser(
+        description='Convert Aeon Timeline 2 project data to Obsidian Markdown fileset.'
+        )
+    parser.add_argument('sourcePaths', metavar='Sourcefile', nargs='+',
+                        help=('The path of the .aeonzip file. Multiple files, directories, '
+                              'or glob patterns start a batch conversion.'))
+    parser.add_argument('--no-streaming', dest='streaming', action='store_false',
+                        help='Load the whole timeline at once instead of streaming it.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only rewrite notes whose content has changed.')
+    parser.add_argument('--workers', metavar='N', type=int, default=1,
+                        help='Number of threads rendering and writing the notes.')
+    parser.add_argument('--processes', metavar='N', type=int, default=None,
+                        help=('Number of projects converted concurrently in batch mode, '
+                              'or read concurrently with --merge. Default: number of CPUs.'))
+    parser.add_argument('--merge', metavar='FOLDER', dest='mergeFolder',
+                        help=('Convert all source files into a single Obsidian folder, with one note '
+                              'per entity shared by the projects.'))
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and export again whenever the source file changes.')
+    parser.add_argument('--debounce', metavar='SECONDS', type=float, default=2.0,
+                        help=('Seconds the source file must stay unchanged before exporting '
+                              'in watch mode. Default: 2.'))
+    parser.add_argument('--poll', dest='polling', action='store_true',
+                        help='Check the source file periodically instead of using inotify in watch mode.')
+    parser.add_argument('--compact', action='store_true',
+                        help='Use memory saving data structures for large timelines.')
+    parser.add_argument('--stats', action='store_true',
+                        help='Print timings and counters of the conversion stages.')
+    parser.add_argument('--trace', metavar='FILE', dest='traceFile',
+                        help='Write timings and counters of the conversion stages to a JSON file.')
+    parser.add_argument('--profile', metavar='FILE', dest='profileFile',
+                        help='Write cProfile statistics to a file.')
+    parser.add_argument('--batch-dates', dest='batchDates', action='store_true',
+                        help='Calculate the dates of all events at once, using NumPy if installed.')
+    parser.add_argument('--cache', metavar='DIR', dest='cacheDir', nargs='?', const=get_default_cache_dir(),
+                        help=('Keep parsed timelines in a cache directory and reuse them while the source '
+                              'file is unchanged. Default directory: the user cache directory.'))
+    parser.add_argument('--cache-size', metavar='MIB', dest='cacheSize', type=int, default=256,
+                        help='Maximum size of the parse cache in MiB. Default: 256.')
+    parser.add_argument('--archive', metavar='FILE', dest='archivePath',
+                        help=('Write a .zip, .tar, or .tar.gz vault archive instead of the Obsidian folder. '
+                              '"-" writes a tar.gz archive to the standard output.'))
+    parser.add_argument('--dry-run', dest='dryRun', action='store_true',
+                        help='List the notes that would be created, changed, or removed, without writing.')
+    parser.add_argument('--diff', dest='showDiff', action='store_true',
+                        help='With --dry-run: show the changes of each note.')
+    parser.add_argument('--snapshot', action='store_true',
+                        help=('Replace the notes all at once when the export is complete, and save the '
+                              'previous notes in a compressed snapshot instead of .bak files.'))
+    parser.add_argument('--restore', metavar='SNAPSHOT', dest='snapshotPath', nargs='?', const='',
+                        help=('Put back the notes saved in a snapshot instead of exporting. '
+                              'Default: the latest snapshot.'))
+    parser.add_argument('--table', choices=ColumnExport.FORMATS, dest='tableFormat',
+                        help=('Also write the events with their roles, tags, and property values as a table '
+                              'next to the Obsidian folder. Parquet and Arrow require PyArrow.'))
+    parser.add_argument('--layout', choices=LinkIndex.LAYOUTS, default='flat',
+                        help=('Put the notes into subfolders by entity type, by event year, or by hash prefix. '
+                              'Default: flat.'))
+    parser.add_argument('--page-size', metavar='N', dest='pageSize', type=int, default=0,
+                        help='Split index notes into pages of at most N links.')
+    parser.add_argument('--frontmatter', action='store_true',
+                        help=('Write the event data as YAML frontmatter for Dataview, '
+                              'and all events to a JSON dataset.'))
+    parser.add_argument('--tag', metavar='TAG', dest='tags', action='append', default=[],
+                        help='Only export events with this tag. Can be repeated.')
+    parser.add_argument('--type', metavar='NAME', dest='entityTypes', action='append', default=[],
+                        help='Only export entities of this type. Entities are not filtered by the other criteria. '
+                        'Can be repeated.')
+    parser.add_argument('--entity', metavar='ENTITY', dest='entities', action='append', default=[],
+                        help='Only export events related to the entity with this name or GUID. Can be repeated.')
+    parser.add_argument('--property', metavar='NAME', dest='properties', action='append', default=[],
+                        help='Only export events with a value for this property. Can be repeated.')
+    parser.add_argument('--from', metavar='DATE', dest='dateFrom',
+                        help='Only export events starting on or after this ISO date (YYYY-MM-DD).')
+    parser.add_argument('--to', metavar='DATE', dest='dateTo',
+                        help='Only export events starting on or before this ISO date (YYYY-MM-DD).')
+    args = parser.parse_args()
+    exportFilter = ExportFilter()
+    exportFilter.tags.update(args.tags)
+    exportFilter.entityTypes.update(args.entityTypes)
+    exportFilter.entities.update(args.entities)
+    exportFilter.properties.update(args.properties)
+    exportFilter.dateFrom = args.dateFrom
+    exportFilter.dateTo = args.dateTo
+    options = dict(streaming=args.streaming, incremental=args.incremental, workers=args.workers,
+                   compact=args.compact, batchDates=args.batchDates, cacheDir=args.cacheDir,
+                   cacheSize=args.cacheSize, layout=args.layout, pageSize=args.pageSize,
+                   archivePath=args.archivePath, dryRun=args.dryRun, showDiff=args.showDiff,
+                   exportFilter=exportFilter if exportFilter.is_active() else None, frontmatter=args.frontmatter,
+                   snapshot=args.snapshot, tableFormat=args.tableFormat)
+    instrumentationOptions = dict(stats=args.stats, traceFile=args.traceFile, profileFile=args.profileFile)
+    singleFile = len(args.sourcePaths) == 1 and os.path.isfile(args.sourcePaths[0])
+    if args.dryRun and (args.watch or args.archivePath):
+        parser.error('a dry run is not available in watch mode or for archives.')
+    if args.mergeFolder and args.watch:
+        parser.error('watch mode is not available for merged projects.')
+    if args.archivePath and (args.watch or args.incremental or not (singleFile or args.mergeFolder)):
+        parser.error('an archive requires a single source file, and no watch or incremental mode.')
+    if args.snapshot and (args.dryRun or args.archivePath):
+        parser.error('snapshots are not available for a dry run or for archives.')
+    if args.tableFormat and args.dryRun:
+        parser.error('a table is not available for a dry run.')
+    if args.tableFormat in ColumnExport.ARROW_FORMATS and not import_pyarrow():
+        parser.error(f'writing {args.tableFormat} files requires PyArrow.')
+    if args.snapshotPath is not None:
+        if not (singleFile or args.mergeFolder):
+            parser.error('restoring a snapshot requires a single source file, or merged projects.')
+        restore(args.mergeFolder or get_obsidian_folder(args.sourcePaths[0]), args.snapshotPath or None)
+    elif args.mergeFolder:
+        run_instrumented(merge, args.sourcePaths, args.mergeFolder, args.processes,
+                         **instrumentationOptions, **options)
+    elif args.watch:
+        if not singleFile:
+            parser.error('watch mode requires a single source file.')
+        run_instrumented(watch, args.sourcePaths[0], debounce=args.debounce, polling=args.polling,
+                         **instrumentationOptions, **options)
+    elif singleFile:
+        run_instrumented(main, args.sourcePaths[0], **instrumentationOptions, **options)
+    else:
+        if args.stats or args.traceFile or args.profileFile:
+            parser.error('instrumentation is not available in batch mode.')
+        if batch(args.sourcePaths, args.processes, **options):
+            sys.exit(1)
@@ -4,7 +4,12 @@ Copyright (c) 2024 Peter Triesberger
 For further information see https://github.com/peter88213/aeon2obsidian
 Published under the MIT License (https://opensource.org/licenses/mit-license.php)
 """
+from aeon2obsidianlib.aeon2_fop import iter_timeline
+from aeon2obsidianlib.date_engine import DateEngine
+from aeon2obsidianlib.export_filter import ExportFilter
 from aeon2obsidianlib.aeon2_fop import open_timeline
+from aeon2obsidianlib.instrumentation import instrumentation
+from aeon2obsidianlib.parse_cache import ParseCache
 from aeon2obsidianlib.timeline import Timeline
 
 
@@ -15,60 +20,178 @@ class Aeon2File:
         self.filePath = filePath
         self.timeline: Timeline = None
 
+        self.streaming = True
+        # if False, load the whole JSON document at once
+
+        self.reuseEvents = False
+        # if True, keep the events that are unchanged since the last read, instead of parsing them again
+        # (streaming only)
+
+        self.batchDates = False
+        # if True, calculate the dates and durations of all events at once
+
+        self.parseCache: ParseCache = None
+        # if set, reuse the timeline parsed by a former run as long as the file is unchanged
+
+        self.exportFilter: ExportFilter = None
+        # if set, only build the entities and events it accepts
+
+        self._tplDateGuid: str = None
+        self._dateEngine: DateEngine = None
+
+        self._templateFingerprint: int = None
+        self._eventCache: dict[str, tuple] = {}
+        # key: event ID, value: (fingerprint, eventClass instance) of the last read
+        self._newEventCache: dict[str, tuple] = None
+
     def read(self) -> str:
         """Read the Aeon 2 project file.
         
         Return a success message.
         """
+        if self.exportFilter is not None and not self.exportFilter.is_active():
+            self.exportFilter = None
+        cacheVariant = self.exportFilter.get_signature() if self.exportFilter is not None else ''
+        if self.parseCache is not None:
+            with instrumentation.stage('ParseCache.load'):
+                cachedTimeline = self.parseCache.load(self.filePath, self.timeline, cacheVariant)
+            if cachedTimeline is not None:
+                self.timeline = cachedTimeline
+                if instrumentation.enabled:
+                    instrumentation.count('cache hits')
+                return 'Aeon 2 file read from the parse cache.'
+
+        with instrumentation.stage('Aeon2File.read'):
+            self._read()
+        if self.parseCache is not None:
+            with instrumentation.stage('ParseCache.store'):
+                self.parseCache.store(self.filePath, self.timeline, cacheVariant)
+        if instrumentation.enabled:
+            instrumentation.count('entities read', len(self.timeline.entities))
+            instrumentation.count('events read', len(self.timeline.events))
+        return 'Aeon 2 file successfully read.'
+
+    def _read(self):
+        """Read the timeline from the Aeon 2 project file."""
+        self._tplDateGuid = None
+        if self.batchDates:
+            self._dateEngine = DateEngine()
+        if self.streaming:
+            #--- Read the aeon file record by record.
+            self._newEventCache = {}
+            holdEvents = self.exportFilter is not None and self.exportFilter.needs_entities()
+            heldEvents = []
+            for section, record, fingerprint in iter_timeline(self.filePath, self.reuseEvents):
+                if section == 'events':
+                    if holdEvents:
+                        # The filter cannot check events before knowing the entities.
+                        heldEvents.append((record, fingerprint))
+                    else:
+                        self._read_event(record, fingerprint)
+                elif section == 'entities':
+                    self._read_entity(record)
+                    holdEvents = False
+                else:
+                    if fingerprint != self._templateFingerprint:
+                        # Events depend on the template's date definition.
+                        self._eventCache = {}
+                        self._templateFingerprint = fingerprint
+                    self._read_template(record)
+            for record, fingerprint in heldEvents:
+                self._read_event(record, fingerprint)
+            self._eventCache = self._newEventCache
+            self._newEventCache = None
+        else:
+            #--- Read the aeon file and get a JSON data structure.
+            jsonData = open_timeline(self.filePath)
+            self._read_template(jsonData['template'])
+            for jsonEntity in jsonData['entities']:
+                self._read_entity(jsonEntity)
+            for jsonEvent in jsonData['events']:
+                self._read_event(jsonEvent)
+        if self._dateEngine is not None:
+            self._dateEngine.run()
+            self._dateEngine = None
+
+    def _read_entity(self, jsonEntity: dict):
+        """Add an entity from Aeon 2 JSON to the timeline."""
+        if self.exportFilter is not None and not self.exportFilter.accept_entity(jsonEntity):
+            # Keep the name, so that the file names do not depend on the filter.
+            self.timeline.skippedEntities[jsonEntity['guid']] = (jsonEntity['name'], jsonEntity['entityType'])
+            if instrumentation.enabled:
+                instrumentation.count('entities skipped')
+            return
+
+        uid = jsonEntity['guid']
+        self.timeline.entities[uid] = self.timeline.entityClass()
+        self.timeline.entities[uid].read(jsonEntity)
+        self.timeline.entitiesByType[jsonEntity['entityType']].append(uid)
+
+    def _read_event(self, jsonEvent: dict, fingerprint: int = None):
+        """Add an event from Aeon 2 JSON to the timeline.
+        
+        Positional arguments:
+            jsonEvent: dict -- Aeon 2 JSON event.
+        
+        Optional arguments:
+            fingerprint: int -- Hash of the JSON text; if given, reuse an unchanged event of the last read.
+        """
+        if self.exportFilter is not None and not self.exportFilter.accept_event(jsonEvent, self._tplDateGuid):
+            # Keep the title and the timestamp, so that the file names do not depend on the filter.
+            dateRange = self.timeline.eventClass.get_date_range(jsonEvent, self._tplDateGuid)
+            timestamp = None if dateRange is None else dateRange[0]
+            self.timeline.skippedEvents[jsonEvent['guid']] = (jsonEvent['title'].strip(), timestamp)
+            if instrumentation.enabled:
+                instrumentation.count('events skipped')
+            return
 
-        #--- Read the aeon file and get a JSON data structure.
-        jsonData = open_timeline(self.filePath)
+        uid = jsonEvent['guid']
+        cachedEvent = self._eventCache.get(uid, None)
+        if fingerprint is not None and cachedEvent is not None and cachedEvent[0] == fingerprint:
+            self.timeline.events[uid] = cachedEvent[1]
+            if instrumentation.enabled:
+                instrumentation.count('events reused')
+        elif self._dateEngine is not None:
+            self.timeline.events[uid] = self.timeline.eventClass()
+            self.timeline.events[uid].read(jsonEvent, self._tplDateGuid, self._dateEngine)
+        else:
+            self.timeline.events[uid] = self.timeline.eventClass()
+            self.timeline.events[uid].read(jsonEvent, self._tplDateGuid)
+        if fingerprint is not None:
+            self._newEventCache[uid] = (fingerprint, self.timeline.events[uid])
+        relationships = self.timeline.events[uid].relationships
+        for roleId in relationships:
+            for entityId in relationships[roleId]:
+                self.timeline.appearances.setdefault(entityId, []).append((uid, roleId))
+
+    def _read_template(self, jsonTemplate: dict):
+        """Read the date definition, types, roles, and properties from Aeon 2 JSON."""
 
         #--- Get the date definition.
-        for tplRgp in jsonData['template']['rangeProperties']:
+        for tplRgp in jsonTemplate['rangeProperties']:
             if tplRgp['type'] == 'date':
                 for tplRgpCalEra in tplRgp['calendar']['eras']:
                     if tplRgpCalEra['name'] == 'AD':
-                        tplDateGuid = tplRgp['guid']
+                        self._tplDateGuid = tplRgp['guid']
                         break
 
         #--- Read type and role names.
-        for jsonType in jsonData['template']['types']:
-            uid = jsonType['guid']
+        for jsonType in jsonTemplate['types']:
+            typeId = jsonType['guid']
             name = jsonType['name']
-            self.timeline.types[uid] = name
-            self.timeline.entitiesByType[uid] = []
+            self.timeline.types[typeId] = name
+            self.timeline.entitiesByType[typeId] = []
             for jsonRole in jsonType['roles']:
                 uid = jsonRole['guid']
                 name = jsonRole['name']
                 self.timeline.roles[uid] = name
+                self.timeline.roleTypes[uid] = typeId
 
         #--- Read property names.
-        for jsonProperty in jsonData['template']['properties']:
+        for jsonProperty in jsonTemplate['properties']:
             uid = jsonProperty['guid']
             name = jsonProperty['name']
             self.timeline.properties[uid] = name
 
-        #--- Read entities.
-        for jsonEntity in jsonData['entities']:
-            uid = jsonEntity['guid']
-            self.timeline.entities[uid] = self.timeline.entityClass()
-            self.timeline.entities[uid].read(jsonEntity)
-            self.timeline.entitiesByType[jsonEntity['entityType']].append(uid)
-
-        #--- Read events.
-        eventTitles = {}
-        for jsonEvent in jsonData['events']:
-            uid = jsonEvent['guid']
-            self.timeline.events[uid] = self.timeline.eventClass()
-            self.timeline.events[uid].read(jsonEvent, tplDateGuid)
-            title = self.timeline.events[uid].title
-            if title in eventTitles:
-                print(f'Multiple event title: {title}')
-                number = eventTitles[title] + 1
-                eventTitles[title] = number
-                self.timeline.events[uid].title = f'{title}({number})'
-            else:
-                eventTitles[title] = 0
-
-        return 'Aeon 2 file successfully read.'
+        if self.exportFilter is not None:
+            self.exportFilter.set_template(self.timeline)
@@ -4,9 +4,11 @@ Copyright (c) 2024 Peter Triesberger
 For further information see https://github.com/peter88213/aeon2nv
 License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
 """
-import codecs
-import json
-import zipfile
+import time
+from aeon2obsidianlib.instrumentation import instrumentation
+
+CHUNK_SIZE = 0x10000
+# number of bytes read from the archive at once when streaming
 
 
 def open_timeline(filePath):
@@ -18,11 +20,162 @@ def open_timeline(filePath):
     Return a Python object containing the timeline structure.
     Raise the "Error" exception in case of error. 
     """
-    with zipfile.ZipFile(filePath, 'r') as myzip:
-        jsonBytes = myzip.read('timeline.json')
-        jsonStr = codecs.decode(jsonBytes, encoding='utf-8')
-    if not jsonStr:
-        raise ValueError('No JSON part found in timeline data.')
-    jsonData = json.loads(jsonStr)
+    import codecs
+    import json
+    import zipfile
+
+    with instrumentation.stage('open_timeline'):
+        with zipfile.ZipFile(filePath, 'r') as myzip:
+            jsonBytes = myzip.read('timeline.json')
+            jsonStr = codecs.decode(jsonBytes, encoding='utf-8')
+        if instrumentation.enabled:
+            instrumentation.count('timeline.json bytes read', len(jsonBytes))
+        if not jsonStr:
+            raise ValueError('No JSON part found in timeline data.')
+        jsonData = json.loads(jsonStr)
     return jsonData
 
+
+def iter_timeline(filePath, fingerprints=False):
+    """Unzip the project file and stream the records of 'timeline.json'.
+
+    Positional arguments:
+        filePath -- Path of the .aeonzip project file to read.
+    
+    Optional arguments:
+        fingerprints -- If True, provide a hash of each record's JSON text.
+        
+    Yield (section, record, fingerprint) tuples, where section is one of 
+    'template', 'entities', 'events'. The template is always 
+    yielded first; records that precede it in the file are held back.
+    Other top level members are skipped.
+    The fingerprint is None, unless requested. It is only valid within the process.
+    Raise ValueError in case of malformed or incomplete data.
+    """
+    import zipfile
+
+    template = None
+    pending = []
+    with zipfile.ZipFile(filePath, 'r') as myzip:
+        with myzip.open('timeline.json') as jsonFile:
+            stream = _JsonStream(jsonFile, fingerprints)
+            stream.expect('{')
+            while stream.peek() != '}':
+                key = stream.value()
+                stream.expect(':')
+                if key in ('entities', 'events'):
+                    stream.expect('[')
+                    while stream.peek() != ']':
+                        record = stream.value()
+                        if template is None:
+                            pending.append((key, record, stream.fingerprint))
+                        else:
+                            yield key, record, stream.fingerprint
+                        stream.separator(']')
+                    stream.expect(']')
+                elif key == 'template':
+                    template = stream.value()
+                    yield key, template, stream.fingerprint
+                    while pending:
+                        yield pending.pop(0)
+                else:
+                    stream.value()
+                stream.separator('}')
+    if template is None:
+        raise ValueError('No template found in timeline data.')
+
+
+class _JsonStream:
+    """Tokenizer for a JSON text read from a binary file in chunks."""
+
+    def __init__(self, binaryFile, fingerprints=False):
+        import codecs
+        import json
+
+        self._file = binaryFile
+        self.fingerprints = fingerprints
+        self.fingerprint: int = None
+        # hash of the last value's JSON text, if fingerprints are enabled
+
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._jsonDecoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def expect(self, char: str):
+        """Consume the next non-blank character, which must be char."""
+        if self.peek() != char:
+            raise ValueError(f'Malformed timeline data: "{char}" expected.')
+        self._pos += 1
+
+    def peek(self) -> str:
+        """Return the next non-blank character without consuming it."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill(CHUNK_SIZE):
+                raise ValueError('Unexpected end of timeline data.')
+
+    def separator(self, closing: str):
+        """Consume a comma, if any, between the members of a container."""
+        char = self.peek()
+        if char == ',':
+            self._pos += 1
+        elif char != closing:
+            raise ValueError(f'Malformed timeline data: "," or "{closing}" expected.')
+
+    def value(self):
+        """Decode and return the next complete JSON value."""
+        if instrumentation.enabled:
+            startTime = time.perf_counter()
+            obj = self._value()
+            instrumentation.add_time('iter_timeline JSON decoding', time.perf_counter() - startTime)
+            return obj
+
+        return self._value()
+
+    def _value(self):
+        """Decode and return the next complete JSON value."""
+        self.peek()
+        chunkSize = CHUNK_SIZE
+        while True:
+            try:
+                obj, end = self._jsonDecoder.raw_decode(self._buffer, self._pos)
+                if end < len(self._buffer) or self._eof:
+                    # A number at the end of the buffer might be truncated.
+                    if self.fingerprints:
+                        self.fingerprint = hash(self._buffer[self._pos:end])
+                    self._pos = end
+                    return obj
+
+            except ValueError:
+                # json.JSONDecodeError; json is imported lazily
+                if self._eof:
+                    raise
+
+            self._fill(chunkSize)
+            chunkSize *= 2
+            # avoid quadratic re-decoding of large values
+
+    def _fill(self, size: int) -> bool:
+        """Append decoded data to the buffer, discarding consumed text.
+        
+        Return False if the end of the file was already reached.
+        """
+        if self._eof:
+            return False
+
+        chunk = self._file.read(size)
+        if instrumentation.enabled:
+            instrumentation.count('timeline.json bytes read', len(chunk))
+        if chunk:
+            text = self._decoder.decode(chunk)
+        else:
+            text = self._decoder.decode(b'', final=True)
+            self._eof = True
+        self._buffer = f'{self._buffer[self._pos:]}{text}'
+        self._pos = 0
+        return True
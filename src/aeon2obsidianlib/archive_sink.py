@@ -0,0 +1,160 @@
+"""Provide a class for writing the exported notes into a vault archive.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+import io
+import os
+import sys
+import threading
+import time
+from aeon2obsidianlib.instrumentation import instrumentation
+from aeon2obsidianlib.note_sink import NoteSink
+
+
+class ArchiveSink(NoteSink):
+    """Write all notes into a single zip or tar archive, or to stdout.
+    
+    The notes are stored in a root folder inside the archive, 
+    so that unpacking the archive creates the Obsidian folder.
+    """
+    FORMATS = ('zip', 'tar', 'tar.gz')
+    STDOUT = '-'
+    # archive path for writing to the standard output
+
+    def __init__(self, archivePath: str, rootFolder: str):
+        """Set the archive path and the root folder.
+        
+        Positional arguments:
+            archivePath: str -- Path of the archive file, or STDOUT.
+            rootFolder: str -- Name of the folder containing the notes inside the archive.
+        """
+        self.archivePath = archivePath
+        self.rootFolder = rootFolder
+
+        self.archiveFormat = self.get_format(archivePath)
+        # one of FORMATS
+
+        self._archive = None
+        self._fileObject = None
+        self._memberClass = None
+        # ZipInfo or TarInfo; set when opening, so that writing needs no imports
+        self._mtime: float = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_format(cls, archivePath: str) -> str:
+        """Return the archive format matching the file extension; tar.gz for stdout."""
+        fileName = archivePath.lower()
+        if fileName.endswith('.zip'):
+            return 'zip'
+
+        if fileName.endswith('.tar'):
+            return 'tar'
+
+        return 'tar.gz'
+
+    def open(self):
+        """Open the archive file, or the standard output, for sequential writing.
+        
+        If the archive cannot be created, close and delete the file.
+        """
+        import tarfile
+        import zipfile
+
+        try:
+            if self.archivePath == self.STDOUT:
+                self._fileObject = sys.__stdout__.buffer
+            else:
+                self._fileObject = open(self.archivePath, 'wb')
+            if self.archiveFormat == 'zip':
+                self._archive = zipfile.ZipFile(self._fileObject, 'w', compression=zipfile.ZIP_DEFLATED)
+                self._memberClass = zipfile.ZipInfo
+            else:
+                mode = 'w|gz' if self.archiveFormat == 'tar.gz' else 'w|'
+                self._archive = tarfile.open(fileobj=self._fileObject, mode=mode)
+                self._memberClass = tarfile.TarInfo
+        except Exception as ex:
+            if self._fileObject is not None and self.archivePath != self.STDOUT:
+                self._fileObject.close()
+                try:
+                    os.remove(self.archivePath)
+                except OSError:
+                    pass
+            self._fileObject = None
+            self._archive = None
+            raise Exception(f'Error: Cannot write "{self._get_archive_name()}": {str(ex)}.')
+
+        self._mtime = time.time()
+
+    def close(self):
+        """Complete the archive and close the underlying file."""
+        try:
+            self._archive.close()
+        except Exception as ex:
+            raise Exception(f'Error: Cannot write "{self._get_archive_name()}": {str(ex)}.')
+
+        finally:
+            if self._fileObject is sys.__stdout__.buffer:
+                self._fileObject.flush()
+            else:
+                self._fileObject.close()
+            self._archive = None
+            self._fileObject = None
+
+    def abort(self):
+        """Close and delete the incomplete archive file after a failed export.
+        
+        An archive written to the standard output cannot be taken back, 
+        so it is just closed.
+        """
+        if self._fileObject is None:
+            return
+
+        if self.archivePath == self.STDOUT:
+            self.close()
+            return
+
+        try:
+            self.close()
+        except Exception:
+            pass
+        try:
+            os.remove(self.archivePath)
+        except OSError:
+            pass
+
+    def write(self, path: str, text: str):
+        """Add a file to the archive."""
+        memberName = f'{self.rootFolder}/{path}'
+        data = text.encode('utf-8')
+        with self._lock:
+            try:
+                if self.archiveFormat == 'zip':
+                    memberInfo = self._memberClass(memberName, time.localtime(self._mtime)[:6])
+                    memberInfo.compress_type = self._archive.compression
+                    self._archive.writestr(memberInfo, data)
+                else:
+                    memberInfo = self._memberClass(memberName)
+                    memberInfo.size = len(data)
+                    memberInfo.mtime = self._mtime
+                    self._archive.addfile(memberInfo, io.BytesIO(data))
+            except Exception as ex:
+                raise Exception(f'Error: Cannot write "{memberName}" to "{self._get_archive_name()}": {str(ex)}.')
+
+        if instrumentation.enabled:
+            instrumentation.count('files written')
+            instrumentation.count('bytes written', len(data))
+
+    def get_message(self, details: str = '') -> str:
+        if details:
+            return f'"{self._get_archive_name()}" successfully written ({details}).'
+
+        return f'"{self._get_archive_name()}" successfully written.'
+
+    def _get_archive_name(self) -> str:
+        if self.archivePath == self.STDOUT:
+            return 'stdout'
+
+        return os.path.normpath(self.archivePath)
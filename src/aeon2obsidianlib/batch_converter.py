@@ -0,0 +1,99 @@
+"""Provide a class for converting many Aeon Timeline 2 projects at once.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+import glob
+import os
+import time
+
+AEON_EXTENSION = '.aeonzip'
+
+
+def collect_sources(patterns: list[str]) -> list[str]:
+    """Return a sorted list of project files without duplicates.
+    
+    Positional arguments:
+        patterns: list of file paths, directory paths, or glob patterns.
+    
+    Directories contribute the .aeonzip files they contain.
+    """
+    sourcePaths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            sourcePaths.update(glob.glob(os.path.join(glob.escape(pattern), f'*{AEON_EXTENSION}')))
+        elif os.path.isfile(pattern):
+            sourcePaths.add(pattern)
+        else:
+            sourcePaths.update(path for path in glob.glob(pattern) if os.path.isfile(path))
+    return sorted(sourcePaths)
+
+
+def _convert_timed(convert, sourcePath: str) -> tuple[bool, str, float]:
+    """Run a conversion and catch any error.
+    
+    Return a tuple (success, last message or error message, seconds).
+    """
+    startTime = time.perf_counter()
+    try:
+        messages = convert(sourcePath)
+        success = True
+        message = messages[-1] if messages else ''
+    except Exception as ex:
+        success = False
+        message = str(ex) or ex.__class__.__name__
+    return success, message, time.perf_counter() - startTime
+
+
+class BatchConverter:
+
+    def __init__(self, convert, processes: int = None):
+        """Set the conversion function and the size of the process pool.
+        
+        Positional arguments:
+            convert -- Picklable function converting a single project; 
+                       takes the source path and returns a list of messages.
+        
+        Optional arguments:
+            processes -- int: Number of worker processes. Default: number of CPUs.
+        """
+        self.convert = convert
+        self.processes = processes
+        self.failed = 0
+
+    def run(self, sourcePaths: list[str]) -> str:
+        """Convert the projects concurrently; an error does not stop the batch.
+        
+        Positional arguments:
+            sourcePaths: list of .aeonzip file paths.
+        
+        Return a summary with a line per project, in the order given.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        startTime = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            futures = [executor.submit(_convert_timed, self.convert, sourcePath) for sourcePath in sourcePaths]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as ex:
+                    # the worker process died
+                    results.append((False, str(ex) or ex.__class__.__name__, 0.0))
+
+        lines = []
+        self.failed = 0
+        for sourcePath, (success, message, seconds) in zip(sourcePaths, results):
+            if success:
+                status = 'OK'
+            else:
+                status = 'FAILED'
+                self.failed += 1
+            lines.append(f'{status:<7}{seconds:8.2f}s  {os.path.normpath(sourcePath)}: {message}')
+        lines.append(
+            f'{len(sourcePaths) - self.failed} of {len(sourcePaths)} projects converted '
+            f'in {time.perf_counter() - startTime:.2f}s, {self.failed} failed.'
+            )
+        return '\n'.join(lines)
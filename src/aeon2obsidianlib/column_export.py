@@ -0,0 +1,181 @@
+"""Provide a class for exporting the events of a timeline as a table.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+import os
+from aeon2obsidianlib.instrumentation import instrumentation
+
+pa = None
+# PyArrow module; imported on first use, because it is optional and importing it takes long
+
+
+def import_pyarrow() -> bool:
+    """Import PyArrow, if installed, and return True on success."""
+    global pa
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError:
+            return False
+
+        pa = pyarrow
+    return True
+
+
+class ColumnExport:
+    """Write one row per event, with the roles, tags, and property values as columns.
+
+    The rows are collected in column batches, so that large timelines
+    can be written with little memory, and PyArrow can take the columns as they are.
+    In CSV files, the entity names of a role and the tags are written as JSON lists, 
+    because names and tags may contain any separator.
+    """
+    FORMATS = ('csv', 'parquet', 'arrow')
+    ARROW_FORMATS = ('parquet', 'arrow')
+    # formats requiring PyArrow
+
+    COLUMNS = ('Guid', 'Title', 'Date', 'Time', 'Duration', 'Tags')
+    # fixed columns; Duration is in minutes
+
+    def __init__(self, filePath: str, fileFormat: str = 'csv'):
+        """Set the path and the format of the table file.
+
+        Positional arguments:
+            filePath: str -- Path of the table file.
+
+        Optional arguments:
+            fileFormat: str -- One of FORMATS.
+        """
+        self.filePath = filePath
+        self.fileFormat = fileFormat
+        self.timeline = None
+
+        self.batchSize = 10000
+        # number of events per column batch
+
+    def write(self) -> str:
+        """Write the events of the timeline to the table file.
+
+        Return a success message.
+        """
+        with instrumentation.stage('ColumnExport.write'):
+            return self._write()
+
+    def _get_batches(self, columns: list[tuple[str, str, str]]):
+        """Generate the table as lists of column values, batchSize events at a time.
+
+        Positional arguments:
+            columns: list of (column name, kind, ID) tuples, as returned by _get_columns().
+        """
+        entityNames = {entityId: entity.name for entityId, entity in self.timeline.entities.items()}
+        eventIds = list(self.timeline.events)
+        for start in range(0, len(eventIds), self.batchSize):
+            uids = eventIds[start:start + self.batchSize]
+            events = [self.timeline.events[uid] for uid in uids]
+            batch = []
+            for __, kind, elementId in columns:
+                if kind == 'role':
+                    batch.append([
+                        [entityNames[entityId] for entityId in event.relationships.get(elementId, ())
+                         if entityId in entityNames]
+                        for event in events
+                        ])
+                elif kind == 'property':
+                    batch.append([event.values.get(elementId, None) for event in events])
+                elif elementId == 'Guid':
+                    batch.append(uids)
+                elif elementId == 'Title':
+                    batch.append([event.title for event in events])
+                elif elementId == 'Date':
+                    batch.append([event.date for event in events])
+                elif elementId == 'Time':
+                    batch.append([event.time for event in events])
+                elif elementId == 'Duration':
+                    batch.append([
+                        (event.lastsDays * 24 + event.lastsHours) * 60 + event.lastsMinutes if event.date else None
+                        for event in events
+                        ])
+                elif elementId == 'Tags':
+                    batch.append([list(event.tags) for event in events])
+            yield batch
+
+    def _get_columns(self) -> list[tuple[str, str, str]]:
+        """Return a list of (column name, kind, ID) tuples.
+
+        kind is 'event' for the fixed columns, 'role', or 'property'.
+        Column names are made unique by a number in parentheses.
+        """
+        columns = [(columnName, 'event', columnName) for columnName in self.COLUMNS]
+        columnNames = set(self.COLUMNS)
+        elements = [('role', roleId, roleName) for roleId, roleName in self.timeline.roles.items()]
+        elements.extend(('property', propertyId, propertyName)
+                        for propertyId, propertyName in self.timeline.properties.items())
+        for kind, elementId, elementName in elements:
+            columnName = elementName
+            i = 2
+            while columnName in columnNames:
+                columnName = f'{elementName} ({i})'
+                i += 1
+            columnNames.add(columnName)
+            columns.append((columnName, kind, elementId))
+        return columns
+
+    def _write(self) -> str:
+        """Write the events of the timeline to the table file.
+
+        Return a success message.
+        """
+        if self.fileFormat in self.ARROW_FORMATS and not import_pyarrow():
+            raise Exception(f'Error: Writing {self.fileFormat} files requires PyArrow.')
+
+        columns = self._get_columns()
+        try:
+            if self.fileFormat == 'csv':
+                self._write_csv(columns)
+            else:
+                self._write_arrow(columns)
+        except Exception as ex:
+            raise Exception(f'Error: Cannot write "{os.path.normpath(self.filePath)}": {str(ex)}.')
+
+        if instrumentation.enabled:
+            instrumentation.count('table rows written', len(self.timeline.events))
+        return f'"{os.path.normpath(self.filePath)}" successfully written.'
+
+    def _write_arrow(self, columns: list[tuple[str, str, str]]):
+        """Write the columns to a Parquet or Arrow IPC file."""
+        fields = []
+        for columnName, kind, elementId in columns:
+            if kind == 'role' or elementId == 'Tags':
+                fields.append(pa.field(columnName, pa.list_(pa.string())))
+            elif elementId == 'Duration':
+                fields.append(pa.field(columnName, pa.int64()))
+            else:
+                fields.append(pa.field(columnName, pa.string()))
+        schema = pa.schema(fields)
+        if self.fileFormat == 'parquet':
+            writer = pa.parquet.ParquetWriter(self.filePath, schema)
+        else:
+            writer = pa.ipc.new_file(self.filePath, schema)
+        with writer:
+            for batch in self._get_batches(columns):
+                writer.write_batch(pa.record_batch(
+                    [pa.array(values, field.type) for values, field in zip(batch, fields)], schema=schema))
+
+    def _write_csv(self, columns: list[tuple[str, str, str]]):
+        """Write the columns to a CSV file, with a header row."""
+        import csv
+        import json
+
+        listColumns = [i for i, (__, kind, elementId) in enumerate(columns)
+                       if kind == 'role' or elementId == 'Tags']
+        with open(self.filePath, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow([columnName for columnName, __, __ in columns])
+            for batch in self._get_batches(columns):
+                for i in listColumns:
+                    batch[i] = [json.dumps(values, ensure_ascii=False) for values in batch[i]]
+                writer.writerows(zip(*batch))
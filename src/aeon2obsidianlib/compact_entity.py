@@ -0,0 +1,26 @@
+"""Provide a memory saving class for Aeon Timeline 2 entity representation.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+import sys
+
+
+class CompactEntity:
+    """Entity with slots and interned type IDs.
+    
+    Can replace Entity as the timeline's entityClass strategy.
+    """
+    __slots__ = ('name', 'entityType', 'notes')
+
+    def __init__(self):
+        self.name: str = None
+        self.entityType: str = None
+        self.notes: str = None
+
+    def read(self, jsonEntity: dict):
+        """Read a property from Aeon 2 JSON."""
+        self.name = jsonEntity['name']
+        self.entityType = sys.intern(jsonEntity['entityType'])
+        self.notes = jsonEntity['notes']
@@ -0,0 +1,85 @@
+"""Provide a memory saving class for Aeon Timeline 2 event representation.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+import sys
+from aeon2obsidianlib.event import Event
+from aeon2obsidianlib.tuple_map import TupleMap
+
+
+class CompactEvent:
+    """Event with slots, interned IDs and tags, and tuple-backed mappings.
+    
+    Can replace Event as the timeline's eventClass strategy.
+    relationships and values are read-only TupleMap instances,
+    tags is a tuple.
+    """
+    __slots__ = (
+        'title',
+        'relationships',
+        'values',
+        'tags',
+        'date',
+        'time',
+        'lastsDays',
+        'lastsHours',
+        'lastsMinutes',
+        )
+    DATE_LIMIT = Event.DATE_LIMIT
+
+    def __init__(self):
+        self.title: str = None
+        self.relationships: TupleMap = None
+        self.values: TupleMap = None
+        self.tags: tuple[str] = None
+        self.date: str = None
+        self.time: str = None
+        self.lastsDays: int = None
+        self.lastsHours: int = None
+        self.lastsMinutes: int = None
+
+    read = Event.read
+    read_date = Event.read_date
+    read_title = Event.read_title
+    set_date = Event.set_date
+    add_span = staticmethod(Event.add_span)
+    get_date_range = staticmethod(Event.get_date_range)
+    get_year = staticmethod(Event.get_year)
+
+    def read_relationships(self, jsonEvent: dict):
+        """Set relationships from Aeon 2 JSON event list."""
+        relationships = {}
+        for relationship in jsonEvent['relationships']:
+            role = relationship.get('role', None)
+            if role:
+                if not role in relationships:
+                    relationships[sys.intern(role)] = []
+                entity = relationship.get('entity', None)
+                if entity:
+                    relationships[role].append(sys.intern(entity))
+        self.relationships = TupleMap(
+            tuple(relationships),
+            tuple(tuple(entities) for entities in relationships.values())
+            )
+
+    def read_tags(self, jsonEvent: dict):
+        """Set tags from Aeon 2 JSON event list."""
+        self.tags = tuple(sys.intern(tag.strip()) for tag in jsonEvent['tags'])
+
+    def read_values(self, jsonEvent: dict):
+        """Set values from Aeon 2 JSON event list."""
+        keys = []
+        values = []
+        for eventValue in jsonEvent['values']:
+            eventProperty = eventValue.get('property', None)
+            if eventProperty:
+                val = eventValue.get('value', None)
+                if val:
+                    if eventProperty in keys:
+                        values[keys.index(eventProperty)] = val.strip()
+                    else:
+                        keys.append(sys.intern(eventProperty))
+                        values.append(val.strip())
+        self.values = TupleMap(tuple(keys), tuple(values))
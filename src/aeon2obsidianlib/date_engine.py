@@ -0,0 +1,192 @@
+"""Provide a class for calculating the dates and durations of many events at once.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+from aeon2obsidianlib.instrumentation import instrumentation
+
+np = None
+# NumPy module; imported on first use, because importing it takes long
+
+MAX_SECONDS = 3652059 * 86400 - 1
+# last second that a datetime object can represent; 3652059 is date.max.toordinal()
+
+
+def import_numpy() -> bool:
+    """Import NumPy, if installed, and return True on success."""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+
+        np = numpy
+    return True
+
+
+class DateEngine:
+    """Collect the date ranges of events and calculate them in one go.
+    
+    The results are identical to Event.set_date(). Whole-second timestamps 
+    within the datetime range are calculated in a batch, using NumPy if available.
+    All other cases, including the erroneous ones, are passed to Event.set_date().
+    """
+
+    def __init__(self):
+        self.useNumpy = import_numpy()
+        self._events = []
+        self._timestamps = []
+        self._spans = []
+        # Parallel lists instead of tuples avoid garbage collector runs.
+
+    def add(self, event, timestamp, span: dict):
+        """Register an event's date range for calculation."""
+        self._events.append(event)
+        self._timestamps.append(timestamp)
+        self._spans.append(span)
+
+    def run(self):
+        """Set date, time, and duration of all registered events."""
+        with instrumentation.stage('DateEngine.run'):
+            batch = []
+            for i, event in enumerate(self._events):
+                timestamp = self._timestamps[i]
+                if timestamp < event.DATE_LIMIT:
+                    continue
+
+                if self._is_batchable(timestamp, self._spans[i]):
+                    batch.append(i)
+                else:
+                    event.set_date(timestamp, self._spans[i])
+            if batch:
+                if self.useNumpy:
+                    self._run_numpy(batch)
+                else:
+                    self._run_python(batch)
+        self._events = []
+        self._timestamps = []
+        self._spans = []
+
+    def _is_batchable(self, timestamp, span: dict) -> bool:
+        """Return True if the date range can be calculated in a batch."""
+        if type(timestamp) is not int:
+            if type(timestamp) is not float or not timestamp.is_integer():
+                return False
+
+        if timestamp > MAX_SECONDS:
+            return False
+
+        if 'years' in span or 'months' in span:
+            for key in ('years', 'months'):
+                if key in span:
+                    if type(span[key]) is not int or abs(span[key]) > 10000:
+                        return False
+
+        return True
+
+    def _run_numpy(self, batch: list[int]):
+        """Calculate the date ranges of the batch with NumPy datetime64 arithmetic.
+        
+        Positional arguments:
+            batch: list of indexes of the registered events.
+        """
+        timestamps = self._timestamps
+        spans = self._spans
+        seconds = np.array([int(timestamps[i]) for i in batch], dtype=np.int64)
+        isoStrings = np.datetime_as_string(
+            np.datetime64('0001-01-01T00:00:00', 's') + seconds.astype('timedelta64[s]'),
+            unit='s',
+            ).tolist()
+
+        #--- Calculate the days of the years/months spans.
+        monthSpans = [j for j, i in enumerate(batch) if 'years' in spans[i] or 'months' in spans[i]]
+        monthSpanDays = {}
+        if monthSpans:
+            starts = np.datetime64('0001-01-01', 'D') + (seconds[monthSpans] // 86400).astype('timedelta64[D]')
+            startMonths = starts.astype('datetime64[M]')
+            startYears = starts.astype('datetime64[Y]').astype(np.int64) + 1970
+            startDaysOfMonth = (starts - startMonths.astype('datetime64[D]')).astype(np.int64) + 1
+            spanYears = np.array([spans[batch[j]].get('years', 0) for j in monthSpans], dtype=np.int64)
+            spanMonths = np.array([spans[batch[j]].get('months', 0) for j in monthSpans], dtype=np.int64)
+            endYears = startYears + spanYears
+            endMonths = startMonths.astype(np.int64) % 12 + 1 + spanMonths
+            carry = np.where(endMonths > 12, (endMonths - 1) // 12, 0)
+            endYears += carry
+            endMonths -= 12 * carry
+            valid = (endMonths >= 1) & (endYears >= 1) & (endYears <= 9999)
+            safeYears = np.where(valid, endYears, 1970)
+            safeMonths = np.where(valid, endMonths, 1)
+            endMonthStarts = ((safeYears - 1970).astype('datetime64[Y]').astype('datetime64[M]')
+                              + (safeMonths - 1).astype('timedelta64[M]'))
+            monthLengths = ((endMonthStarts + 1).astype('datetime64[D]')
+                            - endMonthStarts.astype('datetime64[D]')).astype(np.int64)
+            valid &= startDaysOfMonth <= monthLengths
+            eventEnds = endMonthStarts.astype('datetime64[D]') + (startDaysOfMonth - 1).astype('timedelta64[D]')
+            durations = (eventEnds - starts).astype(np.int64).tolist()
+            valid = valid.tolist()
+            for k, j in enumerate(monthSpans):
+                monthSpanDays[j] = durations[k] if valid[k] else None
+
+        #--- Set the events.
+        for j, i in enumerate(batch):
+            event = self._events[i]
+            span = spans[i]
+            lastsDays = monthSpanDays.get(j, 0)
+            if lastsDays is None:
+                # Let the event raise the error.
+                event.set_date(timestamps[i], span)
+                continue
+
+            isoString = isoStrings[j]
+            event.date = isoString[:-9]
+            event.time = isoString[-8:]
+            event.lastsDays, event.lastsHours, event.lastsMinutes = event.add_span(lastsDays, 0, 0, span)
+
+    def _run_python(self, batch: list[int]):
+        """Calculate the date ranges of the batch with integer arithmetic and caching.
+        
+        Positional arguments:
+            batch: list of indexes of the registered events.
+        """
+        from datetime import date
+
+        dayCache = {}
+        # key: days since 0001-01-01, value: (ISO date string, year, month, day)
+        timeCache = {}
+        # key: seconds of the day, value: ISO time string
+        for i in batch:
+            event = self._events[i]
+            timestamp = self._timestamps[i]
+            span = self._spans[i]
+            dayNumber, secondOfDay = divmod(int(timestamp), 86400)
+            day = dayCache.get(dayNumber, None)
+            if day is None:
+                startDate = date.fromordinal(dayNumber + 1)
+                day = (startDate.isoformat(), startDate.year, startDate.month, startDate.day)
+                dayCache[dayNumber] = day
+            isoTime = timeCache.get(secondOfDay, None)
+            if isoTime is None:
+                hours, rest = divmod(secondOfDay, 3600)
+                isoTime = f'{hours:02d}:{rest // 60:02d}:{rest % 60:02d}'
+                timeCache[secondOfDay] = isoTime
+            if 'years' in span or 'months' in span:
+                __, startYear, startMonth, startDay = day
+                endYear = startYear + span.get('years', 0)
+                endMonth = startMonth + span.get('months', 0)
+                while endMonth > 12:
+                    endMonth -= 12
+                    endYear += 1
+                try:
+                    lastsDays = date(endYear, endMonth, startDay).toordinal() - dayNumber - 1
+                except ValueError:
+                    # Let the event raise the error.
+                    event.set_date(timestamp, span)
+                    continue
+
+            else:
+                lastsDays = 0
+            event.date = day[0]
+            event.time = isoTime
+            event.lastsDays, event.lastsHours, event.lastsMinutes = event.add_span(lastsDays, 0, 0, span)
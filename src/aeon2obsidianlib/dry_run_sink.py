@@ -0,0 +1,79 @@
+"""Provide a class for comparing an export with the Obsidian folder without writing.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+import threading
+from aeon2obsidianlib.file_sink import FileSink
+
+
+class DryRunSink(FileSink):
+    """Report the notes that an export would create, change, or remove.
+    
+    Nothing is written; existing files are only read for comparison.
+    """
+    NOTE_EXTENSION = '.md'
+
+    def __init__(self, folderPath: str):
+        """Set the Obsidian folder to compare with."""
+        super().__init__(folderPath)
+
+        self.showDiff = False
+        # if True, add a unified diff of each changed note to the message
+
+        self.created: list[str] = []
+        self.changed: list[str] = []
+        self.removed: list[str] = []
+        self.unchanged = 0
+        self._diffs: dict[str, list[str]] = {}
+        self._lock = threading.Lock()
+
+    def open(self):
+        pass
+
+    def make_folders(self, folders: set[str]):
+        pass
+
+    def remove(self, path: str):
+        if path.endswith(self.NOTE_EXTENSION):
+            with self._lock:
+                self.removed.append(path)
+
+    def write(self, path: str, text: str):
+        """Compare a note with the file in the Obsidian folder."""
+        if not path.endswith(self.NOTE_EXTENSION):
+            return
+
+        oldText = self.read(path)
+        if oldText == text:
+            with self._lock:
+                self.unchanged += 1
+            return
+
+        diff = None
+        if oldText is not None and self.showDiff:
+            import difflib
+
+            diff = list(difflib.unified_diff(
+                oldText.splitlines(), text.splitlines(), f'a/{path}', f'b/{path}', lineterm=''))
+        with self._lock:
+            if oldText is None:
+                self.created.append(path)
+            else:
+                self.changed.append(path)
+                if diff is not None:
+                    self._diffs[path] = diff
+
+    def get_message(self, details: str = '') -> str:
+        """Return a summary of the differences, with a line per created, changed, or removed note."""
+        lines = [(f'Dry run: {len(self.created)} notes to create, {len(self.changed)} to change, '
+                  f'{len(self.removed)} to remove, {self.unchanged} unchanged.')]
+        for path in sorted(self.created):
+            lines.append(f'+ {path}')
+        for path in sorted(self.changed):
+            lines.append(f'~ {path}')
+            lines.extend(self._diffs.get(path, []))
+        for path in sorted(self.removed):
+            lines.append(f'- {path}')
+        return '\n'.join(lines)
@@ -6,6 +6,8 @@ Published under the MIT License (https://opensource.org/licenses/mit-license.php
 """
 from datetime import datetime
 from datetime import timedelta
+import time
+from aeon2obsidianlib.instrumentation import instrumentation
 
 
 class Event:
@@ -34,66 +36,101 @@ class Event:
         self.lastsHours: int = None
         self.lastsMinutes: int = None
 
-    def read(self, jsonEvent: dict, tplDateGuid: str):
-        """Read an event from Aeon 2 JSON."""
+    def read(self, jsonEvent: dict, tplDateGuid: str, dateEngine=None):
+        """Read an event from Aeon 2 JSON.
+        
+        Optional arguments:
+            dateEngine: DateEngine instance -- if given, defer the date calculation to it.
+        """
         self.read_title(jsonEvent)
-        self.read_date(jsonEvent, tplDateGuid)
+        if dateEngine is not None:
+            dateRange = self.get_date_range(jsonEvent, tplDateGuid)
+            if dateRange is not None:
+                dateEngine.add(self, *dateRange)
+        elif instrumentation.enabled:
+            startTime = time.perf_counter()
+            self.read_date(jsonEvent, tplDateGuid)
+            instrumentation.add_time('Event.read_date', time.perf_counter() - startTime)
+        else:
+            self.read_date(jsonEvent, tplDateGuid)
         self.read_relationships(jsonEvent)
         self.read_values(jsonEvent)
         self.read_tags(jsonEvent)
 
     def read_date(self, jsonEvent: dict, tplDateGuid: str):
         """Set date/time/duration from Aeon 2 JSON event dictionary."""
-        timestamp = 0
+        dateRange = self.get_date_range(jsonEvent, tplDateGuid)
+        if dateRange is not None:
+            self.set_date(*dateRange)
+
+    def set_date(self, timestamp, span: dict):
+        """Set date/time/duration from an Aeon 2 timestamp and span."""
+        if timestamp >= self.DATE_LIMIT:
+            # Restrict date/time calculation to dates within novelibre's range
+            eventStart = datetime.min + timedelta(seconds=timestamp)
+            startDateTime = eventStart.isoformat().split('T')
+            self.date, self.time = startDateTime
+
+            # Calculate duration
+            if 'years' in span or 'months' in span:
+                endYear = eventStart.year
+                endMonth = eventStart.month
+                if 'years' in span:
+                    endYear += span['years']
+                if 'months' in span:
+                    endMonth += span['months']
+                    while endMonth > 12:
+                        endMonth -= 12
+                        endYear += 1
+                eventEnd = datetime(endYear, endMonth, eventStart.day)
+                eventDuration = eventEnd - datetime(eventStart.year, eventStart.month, eventStart.day)
+                lastsDays = eventDuration.days
+                lastsHours = eventDuration.seconds // 3600
+                lastsMinutes = (eventDuration.seconds % 3600) // 60
+            else:
+                lastsDays = 0
+                lastsHours = 0
+                lastsMinutes = 0
+            self.lastsDays, self.lastsHours, self.lastsMinutes = self.add_span(
+                lastsDays, lastsHours, lastsMinutes, span)
+
+    @staticmethod
+    def add_span(lastsDays: int, lastsHours: int, lastsMinutes: int, span: dict) -> tuple:
+        """Return (days, hours, minutes) with the span's weeks, days, hours, minutes, and seconds added."""
+        if 'weeks' in span:
+            lastsDays += span['weeks'] * 7
+        if 'days' in span:
+            lastsDays += span['days']
+        if 'hours' in span:
+            lastsDays += span['hours'] // 24
+            lastsHours += span['hours'] % 24
+        if 'minutes' in span:
+            lastsHours += span['minutes'] // 60
+            lastsMinutes += span['minutes'] % 60
+        if 'seconds' in span:
+            lastsMinutes += span['seconds'] // 60
+        lastsHours += lastsMinutes // 60
+        lastsMinutes %= 60
+        lastsDays += lastsHours // 24
+        lastsHours %= 24
+        return lastsDays, lastsHours, lastsMinutes
+
+    @staticmethod
+    def get_date_range(jsonEvent: dict, tplDateGuid: str) -> tuple:
+        """Return (timestamp, span) of the Aeon 2 JSON event's date, or None."""
         for evtRgv in jsonEvent['rangeValues']:
             if evtRgv['rangeProperty'] == tplDateGuid:
-                timestamp = evtRgv['position']['timestamp']
-                if timestamp >= self.DATE_LIMIT:
-                    # Restrict date/time calculation to dates within novelibre's range
-                    eventStart = datetime.min + timedelta(seconds=timestamp)
-                    startDateTime = eventStart.isoformat().split('T')
-                    self.date, self.time = startDateTime
-
-                    # Calculate duration
-                    if 'years' in evtRgv['span'] or 'months' in evtRgv['span']:
-                        endYear = eventStart.year
-                        endMonth = eventStart.month
-                        if 'years' in evtRgv['span']:
-                            endYear += evtRgv['span']['years']
-                        if 'months' in evtRgv['span']:
-                            endMonth += evtRgv['span']['months']
-                            while endMonth > 12:
-                                endMonth -= 12
-                                endYear += 1
-                        eventEnd = datetime(endYear, endMonth, eventStart.day)
-                        eventDuration = eventEnd - datetime(eventStart.year, eventStart.month, eventStart.day)
-                        lastsDays = eventDuration.days
-                        lastsHours = eventDuration.seconds // 3600
-                        lastsMinutes = (eventDuration.seconds % 3600) // 60
-                    else:
-                        lastsDays = 0
-                        lastsHours = 0
-                        lastsMinutes = 0
-                    if 'weeks' in evtRgv['span']:
-                        lastsDays += evtRgv['span']['weeks'] * 7
-                    if 'days' in evtRgv['span']:
-                        lastsDays += evtRgv['span']['days']
-                    if 'hours' in evtRgv['span']:
-                        lastsDays += evtRgv['span']['hours'] // 24
-                        lastsHours += evtRgv['span']['hours'] % 24
-                    if 'minutes' in evtRgv['span']:
-                        lastsHours += evtRgv['span']['minutes'] // 60
-                        lastsMinutes += evtRgv['span']['minutes'] % 60
-                    if 'seconds' in evtRgv['span']:
-                        lastsMinutes += evtRgv['span']['seconds'] // 60
-                    lastsHours += lastsMinutes // 60
-                    lastsMinutes %= 60
-                    lastsDays += lastsHours // 24
-                    lastsHours %= 24
-                    self.lastsDays = lastsDays
-                    self.lastsHours = lastsHours
-                    self.lastsMinutes = lastsMinutes
-                break
+                return evtRgv['position']['timestamp'], evtRgv['span']
+
+        return None
+
+    @staticmethod
+    def get_year(timestamp) -> str:
+        """Return the ISO year of an Aeon 2 timestamp, or None if there is no displayable date."""
+        if timestamp is None or timestamp < Event.DATE_LIMIT:
+            return None
+
+        return f'{(datetime.min + timedelta(seconds=timestamp)).year:04}'
 
     def read_relationships(self, jsonEvent: dict):
         """Set relationships from Aeon 2 JSON event list."""
@@ -0,0 +1,148 @@
+"""Provide a class for selecting the timeline elements to export.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+from aeon2obsidianlib.event import Event
+
+
+class ExportFilter:
+    """Decide on the raw Aeon 2 JSON records which entities and events to build.
+    
+    An element must meet all criteria that are set; 
+    a criterion with several values is met if any of them matches.
+    Entities are only filtered by their type; the other criteria select events.
+    """
+
+    def __init__(self):
+        self.tags: set[str] = set()
+        # export only events with one of these tags
+
+        self.entityTypes: set[str] = set()
+        # export only entities of the types with these names
+
+        self.entities: set[str] = set()
+        # export only events related to one of the entities with these GUIDs or names
+
+        self.properties: set[str] = set()
+        # export only events with a value for one of the properties with these names
+
+        self.dateFrom: str = None
+        self.dateTo: str = None
+        # export only events starting within this range of ISO dates, both inclusive
+
+        self._tags: set[str] = None
+        self._typeIds: set[str] = None
+        self._entityIds: set[str] = None
+        self._propertyIds: set[str] = None
+        self._start: float = None
+        self._end: float = None
+
+    def is_active(self) -> bool:
+        """Return True if any criterion is set."""
+        return bool(self.tags or self.entityTypes or self.entities or self.properties
+                    or self.dateFrom or self.dateTo)
+
+    def get_signature(self) -> str:
+        """Return a string that is equal for filters with the same criteria."""
+        return repr((sorted(self.tags), sorted(self.entityTypes), sorted(self.entities), sorted(self.properties),
+                     self.dateFrom, self.dateTo))
+
+    def set_template(self, timeline):
+        """Resolve the criteria's names with the timeline's template.
+        
+        Positional arguments:
+            timeline: Timeline instance with the template read.
+        
+        Call this after reading the template and before the first accept_...() call.
+        Raise an exception in case of unknown names or invalid dates.
+        """
+        from datetime import date
+
+        self._tags = set(tag.casefold() for tag in self.tags)
+        self._typeIds = self._get_ids(self.entityTypes, timeline.types, 'entity type')
+        self._propertyIds = self._get_ids(self.properties, timeline.properties, 'property')
+        self._entityIds = set(self.entities)
+        # names are added when the entities are read
+        self._start = None
+        self._end = None
+        if self.dateFrom:
+            self._start = self._get_timestamp(self.dateFrom)
+        if self.dateTo and self.dateTo != date.max.isoformat():
+            self._end = self._get_timestamp(self.dateTo, 1)
+
+    def accept_entity(self, jsonEntity: dict) -> bool:
+        """Return True if an entity from Aeon 2 JSON is to be exported."""
+        if jsonEntity['name'].strip() in self.entities:
+            self._entityIds.add(jsonEntity['guid'])
+        return not self._typeIds or jsonEntity['entityType'] in self._typeIds
+
+    def accept_event(self, jsonEvent: dict, tplDateGuid: str) -> bool:
+        """Return True if an event from Aeon 2 JSON is to be exported.
+        
+        If the entities are filtered by name, read all entities before.
+        """
+        if self._tags:
+            for tag in jsonEvent['tags']:
+                if tag.strip().casefold() in self._tags:
+                    break
+            else:
+                return False
+
+        if self._entityIds:
+            for relationship in jsonEvent['relationships']:
+                if relationship.get('entity', None) in self._entityIds:
+                    break
+            else:
+                return False
+
+        if self._propertyIds:
+            for eventValue in jsonEvent['values']:
+                if eventValue.get('property', None) in self._propertyIds:
+                    if (eventValue.get('value', None) or '').strip():
+                        break
+            else:
+                return False
+
+        if self._start is not None or self._end is not None:
+            dateRange = Event.get_date_range(jsonEvent, tplDateGuid)
+            if dateRange is None:
+                return False
+
+            timestamp = dateRange[0]
+            if self._start is not None and timestamp < self._start:
+                return False
+
+            if self._end is not None and timestamp >= self._end:
+                return False
+
+        return True
+
+    def needs_entities(self) -> bool:
+        """Return True if events can only be checked after reading the entities."""
+        return bool(self.entities)
+
+    def _get_ids(self, names: set[str], elements: dict[str, str], description: str) -> set[str]:
+        """Return the IDs of the named template elements."""
+        ids = set()
+        for name in names:
+            matches = [uid for uid, elementName in elements.items() if elementName == name]
+            if not matches:
+                raise Exception(f'Error: Unknown {description} "{name}".')
+
+            ids.update(matches)
+        return ids
+
+    def _get_timestamp(self, isoDate: str, addDays: int = 0) -> float:
+        """Return the Aeon 2 timestamp of an ISO date's start, optionally some days later."""
+        from datetime import date
+        from datetime import datetime
+        from datetime import timedelta
+
+        try:
+            startDate = date.fromisoformat(isoDate) + timedelta(days=addDays)
+        except (ValueError, OverflowError):
+            raise Exception(f'Error: Invalid date "{isoDate}".')
+
+        return (datetime(startDate.year, startDate.month, startDate.day) - datetime.min).total_seconds()
@@ -0,0 +1,74 @@
+"""Provide a class for writing the exported notes to the Obsidian folder.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+import os
+from aeon2obsidianlib.instrumentation import instrumentation
+from aeon2obsidianlib.note_sink import NoteSink
+
+
+class FileSink(NoteSink):
+    """Write notes to a folder, keeping a .bak copy of each overwritten or removed file."""
+
+    def __init__(self, folderPath: str):
+        """Set the Obsidian folder."""
+        self.folderPath = folderPath
+
+    def open(self):
+        os.makedirs(self.folderPath, exist_ok=True)
+
+    def make_folders(self, folders: set[str]):
+        for folder in folders:
+            os.makedirs(f'{self.folderPath}/{folder}', exist_ok=True)
+
+    def exists(self, path: str) -> bool:
+        return os.path.isfile(f'{self.folderPath}/{path}')
+
+    def read(self, path: str) -> str:
+        try:
+            with open(f'{self.folderPath}/{path}', 'r', encoding='utf-8') as f:
+                return f.read()
+
+        except OSError:
+            return None
+
+    def remove(self, path: str):
+        """Back up a file instead of deleting it."""
+        filePath = f'{self.folderPath}/{path}'
+        try:
+            os.replace(filePath, f'{filePath}.bak')
+        except Exception as ex:
+            raise Exception(f'Error: Cannot remove "{os.path.normpath(filePath)}": {str(ex)}.')
+
+    def write(self, path: str, text: str):
+        """Write a single file and create a backup copy, if applicable."""
+        filePath = f'{self.folderPath}/{path}'
+        backedUp = False
+        if os.path.isfile(filePath):
+            try:
+                os.replace(filePath, f'{filePath}.bak')
+                backedUp = True
+                if instrumentation.enabled:
+                    instrumentation.count('files backed up')
+            except Exception as ex:
+                raise Exception(f'Error: Cannot overwrite "{os.path.normpath(filePath)}": {str(ex)}.')
+
+        try:
+            with open(filePath, 'w', encoding='utf-8') as f:
+                f.write(text)
+        except Exception as ex:
+            if backedUp:
+                os.replace(f'{filePath}.bak', filePath)
+            raise Exception(f'Error: Cannot write "{os.path.normpath(filePath)}": {str(ex)}.')
+
+        if instrumentation.enabled:
+            instrumentation.count('files written')
+            instrumentation.count('bytes written', len(text.encode('utf-8')))
+
+    def get_message(self, details: str = '') -> str:
+        if details:
+            return f'Obsidian files successfully written ({details}).'
+
+        return 'Obsidian files successfully written.'
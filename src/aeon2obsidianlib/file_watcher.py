@@ -0,0 +1,155 @@
+"""Provide a class that watches a file for changes.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+import os
+import select
+import struct
+import sys
+import time
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_CLOEXEC = 0o2000000
+# inotify constants from <sys/inotify.h>
+
+INOTIFY_EVENT = struct.Struct('iIII')
+# wd, mask, cookie, len
+
+
+class FileWatcher:
+    POLL_INTERVAL = 1.0
+    # seconds between two checks when polling
+
+    def __init__(self, filePath: str, callback, debounce: float = 2.0):
+        """Set the file to watch and the function to call on changes.
+        
+        Positional arguments:
+            filePath -- str: Path of the watched file.
+            callback -- Function without arguments, called after the file has changed.
+        
+        Optional arguments:
+            debounce -- float: Seconds the file must stay unchanged before the callback.
+        """
+        self.filePath = filePath
+        self.callback = callback
+        self.debounce = debounce
+        self.polling = not sys.platform.startswith('linux')
+        # if True, check the file's modification time periodically instead of using inotify
+
+    def run(self):
+        """Watch the file until interrupted, calling back after each change.
+        
+        Errors raised by the callback are printed, and watching continues.
+        """
+        inotifyFd = None
+        if not self.polling:
+            inotifyFd = self._init_inotify()
+            self.polling = inotifyFd is None
+        try:
+            signature = self._get_signature()
+            while True:
+                if self.polling:
+                    signature = self._poll(signature)
+                else:
+                    self._wait_inotify(inotifyFd)
+                try:
+                    self.callback()
+                except Exception as ex:
+                    print(f'Error: {str(ex)}')
+        finally:
+            if inotifyFd is not None:
+                os.close(inotifyFd)
+
+    def _get_signature(self) -> tuple:
+        """Return modification time and size of the file, or None if missing."""
+        try:
+            stat = os.stat(self.filePath)
+        except OSError:
+            return None
+
+        return stat.st_mtime_ns, stat.st_size
+
+    def _init_inotify(self):
+        """Return an inotify file descriptor watching the file's directory.
+        
+        Watching the directory catches saves that replace the file.
+        Return None, if inotify is not available.
+        """
+        import ctypes
+        import ctypes.util
+
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            inotifyFd = libc.inotify_init1(IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+
+        if inotifyFd < 0:
+            return None
+
+        directory = os.path.dirname(os.path.abspath(self.filePath)).encode(sys.getfilesystemencoding())
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(inotifyFd, directory, mask) < 0:
+            os.close(inotifyFd)
+            return None
+
+        return inotifyFd
+
+    def _poll(self, signature: tuple) -> tuple:
+        """Wait until the file has changed and then stayed unchanged for the debounce time.
+        
+        Return the new signature.
+        """
+        while True:
+            time.sleep(self.POLL_INTERVAL)
+            newSignature = self._get_signature()
+            if newSignature != signature and newSignature is not None:
+                break
+
+        stableSince = time.monotonic()
+        while time.monotonic() - stableSince < self.debounce:
+            time.sleep(min(self.POLL_INTERVAL, self.debounce))
+            currentSignature = self._get_signature()
+            if currentSignature != newSignature:
+                newSignature = currentSignature
+                stableSince = time.monotonic()
+        return newSignature
+
+    def _read_inotify(self, inotifyFd: int) -> bool:
+        """Read pending inotify events.
+        
+        Return True if any of them concerns the watched file.
+        """
+        fileName = os.path.basename(self.filePath).encode(sys.getfilesystemencoding())
+        data = os.read(inotifyFd, 0x10000)
+        found = False
+        offset = 0
+        while offset < len(data):
+            __, __, __, nameLength = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + nameLength].rstrip(b'\0')
+            offset += nameLength
+            if name == fileName:
+                found = True
+        return found
+
+    def _wait_inotify(self, inotifyFd: int):
+        """Block until the file has changed and no further change occurred for the debounce time."""
+        while not self._read_inotify(inotifyFd):
+            pass
+        deadline = time.monotonic() + self.debounce
+        while True:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 or not select.select([inotifyFd], [], [], timeout)[0]:
+                break
+
+            if self._read_inotify(inotifyFd):
+                deadline = time.monotonic() + self.debounce
+        if self._get_signature() is None:
+            # The file is being replaced; wait for it to reappear.
+            self._wait_inotify(inotifyFd)
@@ -0,0 +1,136 @@
+"""Provide a class for Markdown export with YAML frontmatter from Aeon Timeline 2.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+from aeon2obsidianlib.event import Event
+from aeon2obsidianlib.instrumentation import instrumentation
+from aeon2obsidianlib.obsidian_files import ObsidianFiles
+
+
+class FrontmatterFiles(ObsidianFiles):
+    """Write the event data as YAML frontmatter that Dataview can query.
+    
+    The frontmatter holds date, time, duration in minutes, tags, 
+    the roles as lists of wikilinks, and the property values.
+    Additionally, all events are written to a JSON dataset.
+    Roles and properties sharing a name are made unique by a number in parentheses, 
+    as in the table export.
+    """
+    DATASET_FILE = '__events.json'
+
+    def __init__(self, folderPath: str):
+        """Set the Obsidian folder."""
+        super().__init__(folderPath)
+        self._roleKeys: dict[str, str] = None
+        self._propertyKeys: dict[str, str] = None
+        # key: role or property ID, value: unique name used as YAML and JSON key
+
+    def _build_content(self, event: Event) -> str:
+        """Return a string with the Markdown file content.
+        
+        Positional arguments:
+            event: Event instance.
+        """
+        lines = ['---']
+        if event.date:
+            lines.append(f'date: {event.date}')
+            lines.append(f'time: "{event.time}"')
+            lines.append(f'duration: {self._get_minutes(event)}')
+        if event.tags:
+            lines.append('tags:')
+            for tag in event.tags:
+                lines.append(f'  - {self._to_yaml(tag.replace(" ", "_"))}')
+
+        #--- Links to entities.
+        roleLines = []
+        links = self._linkIndex.links
+        for roleId in event.relationships:
+            entityLinks = [links[entityId] for entityId in event.relationships[roleId] if entityId in links]
+            if entityLinks:
+                roleLines.append(f'  {self._to_yaml(self._roleKeys[roleId])}:')
+                for link in entityLinks:
+                    roleLines.append(f'    - {self._to_yaml(f"[[{link}]]")}')
+        if roleLines:
+            lines.append('roles:')
+            lines.extend(roleLines)
+
+        #--- Event properties.
+        if event.values:
+            lines.append('properties:')
+            for propertyId in event.values:
+                propertyKey = self._propertyKeys[propertyId]
+                lines.append(f'  {self._to_yaml(propertyKey)}: {self._to_yaml(event.values[propertyId])}')
+        lines.append('---')
+
+        #--- Property texts for reading.
+        for propertyId in event.values:
+            eventValue = event.values[propertyId]
+            if eventValue and type(eventValue) == str:
+                lines.append(f'\n### {self.timeline.properties[propertyId]}\n')
+                lines.append(self._to_markdown(eventValue))
+        return '\n'.join(lines)
+
+    def _build_index(self):
+        """Create index pages and the JSON dataset of all events."""
+        self._roleKeys = self._get_unique_keys(self.timeline.roles)
+        self._propertyKeys = self._get_unique_keys(self.timeline.properties)
+        super()._build_index()
+        with instrumentation.stage('FrontmatterFiles._write_dataset'):
+            self._write_dataset()
+
+    def _get_minutes(self, event: Event) -> int:
+        """Return the event's duration in minutes."""
+        return (event.lastsDays * 24 + event.lastsHours) * 60 + event.lastsMinutes
+
+    def _get_unique_keys(self, names: dict[str, str]) -> dict[str, str]:
+        """Return a dictionary mapping the IDs to their names, made unique by a number in parentheses.
+        
+        Positional arguments:
+            names: dict -- key: role or property ID, value: name.
+        """
+        keys = {}
+        usedKeys = set()
+        for uid, name in names.items():
+            key = name
+            i = 2
+            while key in usedKeys:
+                key = f'{name} ({i})'
+                i += 1
+            usedKeys.add(key)
+            keys[uid] = key
+        return keys
+
+    def _to_yaml(self, value: str) -> str:
+        """Return a string as YAML double-quoted scalar."""
+        import json
+
+        return json.dumps(value, ensure_ascii=False)
+
+    def _write_dataset(self):
+        """Write the data of all events to a single JSON file."""
+        import json
+
+        records = []
+        fileNames = self._linkIndex.fileNames
+        paths = self._linkIndex.paths
+        for uid, event in self.timeline.events.items():
+            roles = {}
+            for roleId in event.relationships:
+                roles[self._roleKeys[roleId]] = [
+                    fileNames[entityId] for entityId in event.relationships[roleId] if entityId in fileNames]
+            record = {
+                'guid': uid,
+                'title': event.title,
+                'note': f'{paths[uid]}.md',
+                'date': event.date,
+                'time': event.time,
+                'duration': self._get_minutes(event) if event.date else None,
+                'tags': list(event.tags),
+                'roles': roles,
+                'properties': {self._propertyKeys[propertyId]: event.values[propertyId]
+                               for propertyId in event.values},
+                }
+            records.append(record)
+        self.sink.write(self.DATASET_FILE, json.dumps(records, ensure_ascii=False, indent=1))
@@ -0,0 +1,102 @@
+"""Provide a class for collecting conversion metrics.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+from contextlib import contextmanager
+import threading
+import time
+
+
+class Instrumentation:
+    """Collect wall times, cumulated times, and counters of the conversion stages.
+    
+    Instrumented code checks the "enabled" attribute before 
+    calling any method, so collection costs next to nothing when disabled.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.counters: dict[str, int] = {}
+        # key: counter name, value: count
+        self.timers: dict[str, float] = {}
+        # key: timer name, value: cumulated seconds
+        self.spans: list[tuple] = []
+        # (name, start seconds, duration seconds, thread ID)
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def add_time(self, name: str, seconds: float):
+        """Add seconds to a cumulated timer."""
+        with self._lock:
+            self.timers[name] = self.timers.get(name, 0.0) + seconds
+
+    def count(self, name: str, number: int = 1):
+        """Add number to a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + number
+
+    def reset(self):
+        """Discard all collected data."""
+        self.counters = {}
+        self.timers = {}
+        self.spans = []
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Context manager measuring the wall time of a conversion stage, if enabled."""
+        if not self.enabled:
+            yield
+            return
+
+        startTime = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - startTime
+            with self._lock:
+                self.spans.append((name, startTime - self._origin, duration, threading.get_ident()))
+                self.timers[name] = self.timers.get(name, 0.0) + duration
+
+    def get_report(self) -> str:
+        """Return the collected data as human readable text."""
+        lines = ['Timers (seconds):']
+        for name in sorted(self.timers):
+            lines.append(f'  {name:<40}{self.timers[name]:10.3f}')
+        lines.append('Counters:')
+        for name in sorted(self.counters):
+            lines.append(f'  {name:<40}{self.counters[name]:10d}')
+        return '\n'.join(lines)
+
+    def write_trace(self, filePath: str):
+        """Write the collected data as JSON.
+        
+        The stage spans are in Trace Event Format, 
+        so the file can be viewed with chrome://tracing or Perfetto.
+        """
+        import json
+
+        traceEvents = [
+            {
+                'name': name,
+                'ph': 'X',
+                'ts': round(start * 1e6),
+                'dur': round(duration * 1e6),
+                'pid': 0,
+                'tid': threadId,
+            }
+            for name, start, duration, threadId in self.spans
+            ]
+        data = {
+            'traceEvents': traceEvents,
+            'timers': self.timers,
+            'counters': self.counters,
+        }
+        with open(filePath, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+
+
+instrumentation = Instrumentation()
+# shared by all instrumented modules
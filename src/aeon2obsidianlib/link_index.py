@@ -0,0 +1,214 @@
+"""Provide a class that maps timeline elements to note file names.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+
+
+class LinkIndex:
+    """File names of the notes, which are also their wikilink targets.
+    
+    The index is built once per export, so that each title is sanitized only once.
+    """
+    RESERVED_NAMES = ('__index', '__events', '__timeline', '__undated')
+    # file names of the fixed index pages; the names of the period notes are passed to build()
+
+    LAYOUTS = ('flat', 'type', 'year', 'hash')
+    # flat: all notes in the Obsidian folder
+    # type: entity notes in one subfolder per type, event notes in the events subfolder
+    # year: like type, but event notes in one subfolder per year
+    # hash: notes spread over 256 subfolders by a hash of the file name
+
+    EVENTS_FOLDER = '__events'
+    UNDATED_FOLDER = 'undated'
+
+    def __init__(self):
+        self.fileNames: dict[str, str] = {}
+        # key: entity, event, or type ID, value: file name without extension
+
+        self.paths: dict[str, str] = {}
+        # key: entity, event, or type ID, value: path relative to the Obsidian folder, without extension
+
+        self.links: dict[str, str] = {}
+        # key: entity, event, or type ID, value: wikilink target
+
+        self.duplicates: dict[str, list[str]] = {}
+        # key: case folded path shared by several elements, value: IDs of the elements given a suffix
+
+    def build(self, timeline, strip_title, layout: str = 'flat', previousPaths: dict[str, str] = None,
+              indexNames: list[str] = None, typePages: dict[str, int] = None):
+        """Create the file names of all entities, events, and entity types.
+        
+        Positional arguments:
+            timeline: Timeline instance.
+            strip_title -- Function returning a title without forbidden characters.
+        
+        Optional arguments:
+            layout: str -- One of LAYOUTS.
+            previousPaths: dict -- key: element ID, value: path of the last export.
+            indexNames: list of str -- Further generated index notes and their pages in the Obsidian folder.
+            typePages: dict -- key: type ID, value: number of pages of the type's index.
+        
+        File names are compared case-insensitively after stripping, 
+        because many file systems do not distinguish case.
+        Elements sharing a path get a suffix derived from their GUID, 
+        so the names do not depend on the order of the elements.
+        If an element had the shared path in the last export, 
+        it keeps the path, so that existing links remain valid.
+        Elements named like an index note always get a suffix.
+        The further pages of a type's index are named like elements, 
+        with the page number appended to the type's name and the ID "{type ID}:{page number}".
+        Elements excluded by the export filter get no name, but take part in the comparison, 
+        so that the suffixes do not depend on the filter.
+        """
+        if layout not in self.LAYOUTS:
+            raise Exception(f'Error: Unknown layout "{layout}".')
+
+        baseNames = {}
+        for typeId, typeName in timeline.types.items():
+            baseNames[typeId] = f'_{strip_title(typeName)}'
+        for entityId, entity in timeline.entities.items():
+            baseNames[entityId] = strip_title(entity.name)
+        for eventId, event in timeline.events.items():
+            baseNames[eventId] = strip_title(event.title)
+        skipped = set()
+        for entityId, (name, __) in timeline.skippedEntities.items():
+            if entityId not in timeline.entities:
+                baseNames[entityId] = strip_title(name)
+                skipped.add(entityId)
+        for eventId, (title, __) in timeline.skippedEvents.items():
+            if eventId not in timeline.events:
+                baseNames[eventId] = strip_title(title)
+                skipped.add(eventId)
+
+        if layout == 'flat':
+            folders = {}
+        else:
+            folders = self._get_folders(timeline, layout, baseNames)
+        if typePages:
+            for typeId, pageCount in typePages.items():
+                for i in range(2, pageCount + 1):
+                    baseNames[f'{typeId}:{i}'] = f'{baseNames[typeId]}_{i}'
+
+        #--- Group the elements by their case folded path.
+        groups = {}
+        for uid, baseName in baseNames.items():
+            folder = folders.get(uid, None)
+            path = f'{folder}/{baseName}' if folder else baseName
+            groups.setdefault(path.casefold(), []).append(uid)
+
+        #--- Assign the unique names first, so that no suffixed name can take them.
+        reserved = set(name.casefold() for name in self.RESERVED_NAMES)
+        if indexNames:
+            reserved.update(name.casefold() for name in indexNames)
+        claimed = set(reserved)
+        fileNames = {}
+        duplicates = {}
+        for path, uids in groups.items():
+            if len(uids) == 1 and path not in reserved:
+                if uids[0] not in skipped:
+                    fileNames[uids[0]] = baseNames[uids[0]]
+                claimed.add(path)
+            else:
+                duplicates[path] = uids
+        for path, uids in duplicates.items():
+            keeper = None
+            if previousPaths and path not in reserved:
+                for uid in uids:
+                    previousPath = previousPaths.get(uid, None)
+                    if previousPath is not None and previousPath.casefold() == path:
+                        keeper = uid
+                        claimed.add(path)
+                        break
+
+            for uid in uids:
+                if uid == keeper:
+                    fileName = baseNames[uid]
+                else:
+                    fileName = self._get_unique_name(uid, baseNames[uid], folders.get(uid, None), claimed)
+                if uid not in skipped:
+                    fileNames[uid] = fileName
+            duplicates[path] = [uid for uid in uids if uid != keeper and uid not in skipped]
+        self.fileNames = fileNames
+        self.duplicates = {path: uids for path, uids in duplicates.items() if uids}
+
+        if layout == 'flat':
+            self.paths = fileNames
+            self.links = fileNames
+        else:
+            self.paths = {}
+            self.links = {}
+            for uid, fileName in fileNames.items():
+                folder = folders.get(uid, None)
+                if folder:
+                    self.paths[uid] = path = f'{folder}/{fileName}'
+                    self.links[uid] = f'{path}|{fileName}'
+                else:
+                    self.paths[uid] = self.links[uid] = fileName
+
+    def get_collision_report(self) -> str:
+        """Return a summary of the names that were made unique, or an empty string."""
+        if not self.duplicates:
+            return ''
+
+        renamed = sum(len(uids) for uids in self.duplicates.values())
+        return (f'{renamed} notes sharing {len(self.duplicates)} file names '
+                f'got a suffix derived from their GUID.')
+
+    def get_folders(self) -> set[str]:
+        """Return the subfolders containing notes, relative to the Obsidian folder."""
+        return set(path.rsplit('/', 1)[0] for path in self.paths.values() if '/' in path)
+
+    def _get_folders(self, timeline, layout: str, baseNames: dict[str, str]) -> dict[str, str]:
+        """Return a dictionary with the subfolders of the entity and event notes.
+        
+        The elements excluded by the export filter are included.
+        The type index pages remain in the Obsidian folder.
+        """
+        folders = {}
+        if layout == 'hash':
+            import hashlib
+
+            for uid, fileName in baseNames.items():
+                if uid not in timeline.types:
+                    folders[uid] = hashlib.blake2b(fileName.casefold().encode('utf-8'), digest_size=1).hexdigest()
+            return folders
+
+        for typeId, entityIds in timeline.entitiesByType.items():
+            typeFolder = baseNames[typeId][1:] or '_'
+            for entityId in entityIds:
+                folders[entityId] = typeFolder
+        for entityId, (__, typeId) in timeline.skippedEntities.items():
+            folders.setdefault(entityId, baseNames[typeId][1:] or '_')
+        for eventId, event in timeline.events.items():
+            folders[eventId] = self._get_event_folder(layout, event.date)
+        for eventId, (__, timestamp) in timeline.skippedEvents.items():
+            if eventId not in folders:
+                eventYear = timeline.eventClass.get_year(timestamp) if layout == 'year' else None
+                folders[eventId] = self._get_event_folder(layout, eventYear)
+        return folders
+
+    def _get_event_folder(self, layout: str, eventDate: str) -> str:
+        """Return the subfolder of an event note with the given ISO date or year, or None, in the type or year layout."""
+        if layout != 'year':
+            return self.EVENTS_FOLDER
+
+        if eventDate:
+            return f'{self.EVENTS_FOLDER}/{eventDate.split("-", 1)[0]}'
+
+        return f'{self.EVENTS_FOLDER}/{self.UNDATED_FOLDER}'
+
+    def _get_unique_name(self, uid: str, baseName: str, folder: str, claimed: set[str]) -> str:
+        """Return the base name with a GUID-derived suffix that no other note uses, and claim it."""
+        import hashlib
+
+        digest = hashlib.blake2b(uid.encode('utf-8'), digest_size=20).hexdigest()
+        for length in (6, 12, 40):
+            fileName = f'{baseName} ({digest[:length]})'
+            path = f'{folder}/{fileName}' if folder else fileName
+            if path.casefold() not in claimed:
+                break
+
+        claimed.add(path.casefold())
+        return fileName
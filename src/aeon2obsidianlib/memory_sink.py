@@ -0,0 +1,33 @@
+"""Provide a class for keeping the exported notes in memory.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+from aeon2obsidianlib.note_sink import NoteSink
+
+
+class MemorySink(NoteSink):
+    """Store notes in a dictionary, e.g. for measuring the rendering without I/O."""
+
+    def __init__(self):
+        self.files: dict[str, str] = {}
+        # key: path relative to the vault root, value: file content
+
+    def exists(self, path: str) -> bool:
+        return path in self.files
+
+    def read(self, path: str) -> str:
+        return self.files.get(path, None)
+
+    def remove(self, path: str):
+        self.files.pop(path, None)
+
+    def write(self, path: str, text: str):
+        self.files[path] = text
+
+    def get_message(self, details: str = '') -> str:
+        if details:
+            return f'{len(self.files)} files rendered in memory ({details}).'
+
+        return f'{len(self.files)} files rendered in memory.'
@@ -0,0 +1,58 @@
+"""Provide a base class for the destinations of the exported notes.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+
+
+class NoteSink:
+    """Interface between ObsidianFiles and the place where the notes are stored.
+    
+    All paths are relative to the vault root, use "/" as separator, 
+    and include the file extension.
+    Writing must be thread safe, because notes can be written by several workers.
+    """
+
+    def open(self):
+        """Prepare the destination for writing."""
+        pass
+
+    def close(self):
+        """Complete the export."""
+        pass
+
+    def abort(self):
+        """Clean up after a failed export."""
+        self.close()
+
+    def make_folders(self, folders: set[str]):
+        """Create the subfolders of the notes, if the destination needs them."""
+        pass
+
+    def exists(self, path: str) -> bool:
+        """Return True if a file exists at the destination."""
+        return False
+
+    def read(self, path: str) -> str:
+        """Return the content of a file at the destination, or None if there is none."""
+        return None
+
+    def remove(self, path: str):
+        """Remove a file from the destination."""
+        pass
+
+    def write(self, path: str, text: str):
+        """Store a file at the destination."""
+        raise NotImplementedError
+
+    def get_message(self, details: str = '') -> str:
+        """Return a success message.
+        
+        Optional arguments:
+            details: str -- Statistics of the export, to be put in parentheses.
+        """
+        if details:
+            return f'Notes successfully written ({details}).'
+
+        return 'Notes successfully written.'
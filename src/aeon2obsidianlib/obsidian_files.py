@@ -4,41 +4,104 @@ Copyright (c) 2024 Peter Triesberger
 For further information see https://github.com/peter88213/aeon2obsidian
 Published under the MIT License (https://opensource.org/licenses/mit-license.php)
 """
-import os
+import threading
 from aeon2obsidianlib.event import Event
-from re._compiler import isstring
+from aeon2obsidianlib.file_sink import FileSink
+from aeon2obsidianlib.instrumentation import instrumentation
+from aeon2obsidianlib.link_index import LinkIndex
+from aeon2obsidianlib.note_sink import NoteSink
 
 
 class ObsidianFiles:
     FORBIDDEN_CHARACTERS = ('\\', '/', ':', '*', '?', '"', '<', '>', '|')
     # set of characters that filenames cannot contain
 
+    _STRIP_TABLE = str.maketrans('', '', ''.join(FORBIDDEN_CHARACTERS))
+
+    MANIFEST_FILE = '.aeon2obsidian.json'
+    # manifest in the Obsidian folder with the file names of the last run,
+    # and the content hashes used by the incremental mode
+
     def __init__(self, folderPath:str):
         """Set the Obsidian folder."""
         self.folderPath = folderPath
         self.timeline = None
 
+        self.sink: NoteSink = FileSink(folderPath)
+        # destination of the notes
+
+        self.incremental = False
+        # if True, only rewrite notes whose content has changed since the last run
+
+        self.workers = 1
+        # number of threads rendering and writing the notes
+
+        self.layout = 'flat'
+        # subfolder layout of the notes; see LinkIndex.LAYOUTS
+
+        self.pageSize = 0
+        # maximum number of links per index page; 0 means no limit
+
+        self.collisionReport = ''
+        # summary of the file names made unique by the last write, or an empty string
+
+        self._manifest: dict[str, list[str]] = None
+        # key: GUID or index page name, value: [file name, content hash or None] of the last run
+
+        self._newManifest: dict[str, list[str]] = None
+        self._blake2b = None
+        # hash function of the incremental mode; imported when writing
+        self._linkIndex: LinkIndex = None
+        self._appearances: dict[str, list[tuple[str, str]]] = None
+        self._chronology: list[str] = None
+        # IDs of the dated events, sorted by date and time
+        self._neighbors: dict[str, tuple[str, str]] = None
+        # key: event ID, value: IDs of the previous and next dated event, or None
+        self._skipped = 0
+        self._lock = threading.Lock()
+
     def write(self) -> str:
         """Create a set of Markdown files in the Obsidian folder.
         
         Return a success message.
         """
-        os.makedirs(self.folderPath, exist_ok=True)
-        self._build_index()
+        with instrumentation.stage('ObsidianFiles.write'):
+            return self._write()
 
-        for uid in self.timeline.entities:
-            entity = self.timeline.entities[uid]
-            name = self._strip_title(entity.name)
-            text = self._to_markdown(entity.notes)
-            self._write_file(f'{self.folderPath}/{name}.md', text)
+    def _write(self) -> str:
+        """Create a set of Markdown files in the Obsidian folder.
+        
+        Return a success message.
+        """
+        self.sink.open()
+        try:
+            self._manifest = self._read_manifest()
+            self._newManifest = {}
+            if self.incremental:
+                import hashlib
 
-        for uid in self.timeline.events:
-            event = self.timeline.events[uid]
-            title = self._strip_title(event.title)
-            text = self._build_content(event)
-            self._write_file(f'{self.folderPath}/{title}.md', text)
+                self._blake2b = hashlib.blake2b
+                self._skipped = 0
+            with instrumentation.stage('ObsidianFiles._build_link_index'):
+                self._build_link_index()
+            self.collisionReport = self._linkIndex.get_collision_report()
+            self.sink.make_folders(self._linkIndex.get_folders())
+            with instrumentation.stage('ObsidianFiles._sort_events'):
+                self._sort_events()
+            with instrumentation.stage('ObsidianFiles._build_index'):
+                self._build_index()
+            notes = self._collect_notes()
+            if self.workers > 1:
+                self._write_notes_parallel(notes)
+            else:
+                self._write_notes(notes)
+            message = self._finish()
+        except BaseException:
+            self.sink.abort()
+            raise
 
-        return 'Obsidian files successfully written.'
+        self.sink.close()
+        return message
 
     def _build_content(self, event:Event) -> str:
         """Return a string with the Markdown file content.
@@ -57,20 +120,23 @@ class ObsidianFiles:
                 lines.append(self._to_markdown(eventValue))
 
         #--- Links to entities.
+        links = self._linkIndex.links
         for roleId in event.relationships:
             roleName = self.timeline.roles[roleId]
             for entityId in event.relationships[roleId]:
-                entityName = self.timeline.entities[entityId].name
-                link = self._strip_title(entityName)
-                lines.append(f'- {roleName}: [[{link}]]')
+                link = links.get(entityId, None)
+                if link is not None:
+                    # the entity may have been excluded from the export
+                    lines.append(f'- {roleName}: [[{link}]]')
 
         #--- Tags.
         for tag in event.tags:
             lines.append(f"#{tag.replace(' ', '_')}")
 
-        #--- Date and time.
-        lines.append(event.date)
-        lines.append(event.time)
+        #--- Date and time; undated events have none.
+        if event.date:
+            lines.append(event.date)
+            lines.append(event.time)
 
         #--- Duration.
         durationList = []
@@ -85,70 +151,339 @@ class ObsidianFiles:
             lines.append(durationStr)
         return '\n\n'.join(lines)
 
+    def _build_entity_content(self, entity) -> str:
+        """Return a string with the Markdown file content.
+        
+        Positional arguments:
+            entity: Entity instance.
+        """
+        return self._to_markdown(entity.notes)
+
+    def _build_entity_note(self, uid: str) -> str:
+        """Return the Markdown file content of an entity, with the events it appears in.
+        
+        Positional arguments:
+            uid: str -- Entity ID.
+        """
+        text = self._build_entity_content(self.timeline.entities[uid])
+        appearances = self._appearances.get(uid, None)
+        if not appearances:
+            return text
+
+        #--- Merge the roles the entity has in the same event.
+        entries = []
+        for eventId, roleId in appearances:
+            if entries and entries[-1][0] == eventId:
+                entries[-1][1].append(self.timeline.roles[roleId])
+            else:
+                entries.append((eventId, [self.timeline.roles[roleId]]))
+
+        lines = []
+        links = self._linkIndex.links
+        for eventId, roleNames in entries:
+            event = self.timeline.events[eventId]
+            roles = ', '.join(roleNames)
+            if event.date:
+                lines.append(f'- {event.date} {event.time}: [[{links[eventId]}]] ({roles})')
+            else:
+                lines.append(f'- [[{links[eventId]}]] ({roles})')
+        appearsIn = '## Appears in\n\n' + '\n'.join(lines)
+        if not text.strip():
+            return appearsIn
+
+        return f'{text}\n\n{appearsIn}'
+
     def _build_index(self):
         """Create index pages."""
         mainIndexlines = []
 
         #--- Create an index file with the events.
         mainIndexlines.append(f'- [[__events]]')
+        mainIndexlines.append(f'- [[__timeline]]')
+        self._build_timeline_index()
+        links = self._linkIndex.links
         lines = []
         for uid in self.timeline.events:
-            eventTitle = self.timeline.events[uid].title
-            lines.append(f'- [[{self._strip_title(eventTitle)}]]')
-        text = '\n'.join(lines)
-        self._write_file(f'{self.folderPath}/__events.md', text)
+            lines.append(f'- [[{links[uid]}]]')
+        self._write_index_pages('__events', '__events', lines)
 
         for typeUid in self.timeline.entitiesByType:
-            entityType = f'_{self._strip_title(self.timeline.types[typeUid])}'
+            entityType = self._linkIndex.fileNames[typeUid]
             mainIndexlines.append(f'- [[{entityType}]]')
             entityUidList = self.timeline.entitiesByType[typeUid]
 
             #--- Create an index file with the entities of the type.
             lines = []
             for entityUid in entityUidList:
-                entityName = self.timeline.entities[entityUid].name
-                lines.append(f'- [[{self._strip_title(entityName)}]]')
-            text = '\n'.join(lines)
-            self._write_file(f'{self.folderPath}/{entityType}.md', text)
+                lines.append(f'- [[{links[entityUid]}]]')
+            self._write_index_pages(typeUid, entityType, lines)
 
         #--- Create a main index file with the types and event link.
         text = '\n'.join(mainIndexlines)
-        self._write_file(f'{self.folderPath}/__index.md', text)
+        self._write_note('__index', '__index', text)
+
+    def _build_event_note(self, uid: str) -> str:
+        """Return the Markdown file content of an event, with links to its chronological neighbors.
+        
+        Positional arguments:
+            uid: str -- Event ID.
+        """
+        text = self._build_content(self.timeline.events[uid])
+        previousId, nextId = self._neighbors.get(uid, (None, None))
+        lines = []
+        if previousId is not None:
+            lines.append(f'- previous: [[{self._linkIndex.links[previousId]}]]')
+        if nextId is not None:
+            lines.append(f'- next: [[{self._linkIndex.links[nextId]}]]')
+        if not lines:
+            return text
+
+        return f'{text}\n\n' + '\n'.join(lines)
+
+    def _build_link_index(self):
+        """Create the file names and link targets of all notes.
+        
+        The year and month notes of the timeline index and the pages of all index notes 
+        are claimed, so that no entity or event note can overwrite them.
+        The file names of the last run are passed, so that an element keeps 
+        its name when another element with the same name is added.
+        """
+        previousPaths = {uid: entry[0] for uid, entry in self._manifest.items()}
+        yearNames = set()
+        lineCounts = {'__events': len(self.timeline.events), '__undated': 0}
+        # key: name of a paged index note, value: number of links
+        for event in self.timeline.events.values():
+            if event.date:
+                yearNames.add(f'__{event.date[:-6]}')
+                monthName = f'__{event.date[:-3]}'
+                lineCounts[monthName] = lineCounts.get(monthName, 0) + 1
+            else:
+                lineCounts['__undated'] += 1
+        indexNames = list(yearNames)
+        for indexName, lineCount in lineCounts.items():
+            indexNames.append(indexName)
+            indexNames.extend(f'{indexName}_{i}' for i in range(2, self._get_page_count(lineCount) + 1))
+        typePages = {}
+        for typeId, entityIds in self.timeline.entitiesByType.items():
+            typePages[typeId] = self._get_page_count(len(entityIds))
+        self._linkIndex = LinkIndex()
+        self._linkIndex.build(self.timeline, self._strip_title, self.layout, previousPaths, indexNames, typePages)
+
+    def _build_timeline_index(self):
+        """Create a chronological index page with a note per year and per month."""
+        links = self._linkIndex.links
+        events = self.timeline.events
+        years = {}
+        # key: year, value: dict with key: month, value: list of lines
+        for uid in self._chronology:
+            event = events[uid]
+            months = years.setdefault(event.date[:-6], {})
+            months.setdefault(event.date[:-3], []).append(f'- {event.date} {event.time}: [[{links[uid]}]]')
+
+        timelineLines = []
+        for year, months in years.items():
+            yearLines = []
+            eventCount = 0
+            for month, lines in months.items():
+                yearLines.append(f'- [[__{month}|{month}]] ({len(lines)} events)')
+                eventCount += len(lines)
+                self._write_index_pages(f'__{month}', f'__{month}', lines)
+            timelineLines.append(f'- [[__{year}|{year}]] ({eventCount} events)')
+            self._write_note(f'__{year}', f'__{year}', '\n'.join(yearLines))
+
+        undatedLines = [f'- [[{links[uid]}]]' for uid in events if not events[uid].date]
+        if undatedLines:
+            timelineLines.append(f'- [[__undated|undated]] ({len(undatedLines)} events)')
+            self._write_index_pages('__undated', '__undated', undatedLines)
+        self._write_note('__timeline', '__timeline', '\n'.join(timelineLines))
+
+    def _collect_notes(self) -> list:
+        """Return a list of (uid, file path, content builder, builder argument) tuples for the notes to write."""
+        paths = self._linkIndex.paths
+        notes = []
+        for uid in self.timeline.entities:
+            notes.append((uid, paths[uid], self._build_entity_note, uid))
+
+        for uid in self.timeline.events:
+            notes.append((uid, paths[uid], self._build_event_note, uid))
+        return notes
+
+    def _finish(self) -> str:
+        """Complete the export after all notes are written.
+        
+        Return a success message.
+        """
+        if not self.incremental:
+            self._write_manifest()
+            return self.sink.get_message()
+
+        removed = self._remove_obsolete_notes()
+        self._write_manifest()
+        written = len(self._newManifest) - self._skipped
+        return self.sink.get_message(f'{written} written, {self._skipped} unchanged, {removed} removed')
+
+    def _get_page_count(self, lineCount: int) -> int:
+        """Return the number of pages of an index note with lineCount links."""
+        if not self.pageSize or lineCount <= self.pageSize:
+            return 1
+
+        return (lineCount + self.pageSize - 1) // self.pageSize
+
+    def _read_manifest(self) -> dict[str, list[str]]:
+        """Return the manifest of the last run, if any."""
+        import json
+
+        try:
+            return json.loads(self.sink.read(self.MANIFEST_FILE))['notes']
+
+        except (TypeError, ValueError, KeyError):
+            return {}
+
+    def _remove_obsolete_notes(self) -> int:
+        """Back up notes of the last run that have been removed or renamed.
+        
+        Return the number of notes removed.
+        """
+        fileNames = set(entry[0] for entry in self._newManifest.values())
+        removed = 0
+        for fileName, __ in self._manifest.values():
+            if fileName in fileNames:
+                continue
+
+            path = f'{fileName}.md'
+            if self.sink.exists(path):
+                self.sink.remove(path)
+                removed += 1
+        if instrumentation.enabled:
+            instrumentation.count('files removed', removed)
+        return removed
+
+    def _sort_events(self):
+        """Sort the events by date and time, and the events each entity appears in.
+        
+        The ISO date and time strings serve as sort keys; undated events go last.
+        """
+        events = self.timeline.events
+        sortKeys = {}
+        for eventId, event in events.items():
+            if event.date:
+                sortKeys[eventId] = (0, event.date, event.time)
+            else:
+                sortKeys[eventId] = (1, '', '')
+        self._chronology = [eventId for eventId in sorted(sortKeys, key=sortKeys.__getitem__) if events[eventId].date]
+        self._neighbors = {}
+        previousId = None
+        for eventId in self._chronology:
+            if previousId is not None:
+                self._neighbors[previousId] = (self._neighbors[previousId][0], eventId)
+            self._neighbors[eventId] = (previousId, None)
+            previousId = eventId
+
+        self._appearances = {}
+        for entityId, appearances in self.timeline.appearances.items():
+            self._appearances[entityId] = sorted(appearances, key=lambda appearance: sortKeys[appearance[0]])
 
     def _strip_title(self, title: str) -> str:
         """Return title with characters removed that must not appear in a file name."""
-        for c in self.FORBIDDEN_CHARACTERS:
-            title = title.replace(c, '')
-        return title
+        return title.translate(self._STRIP_TABLE)
 
     def _to_markdown(self, text: str) -> str:
         """Return text with double linebreaks."""
         return text.replace('\n', '\n\n')
 
-    def _write_file(self, filePath: str, text: str) -> str:
-        """Write a single file and create a backup copy, if applicable.
+    def _write_index_pages(self, uid: str, fileName: str, lines: list[str]):
+        """Write an index note, split into pages with navigation links if it is too long.
+        
+        Positional arguments:
+            uid: str -- GUID of the indexed type, or the index page name.
+            fileName: str -- File name of the first page; the other pages get a number appended.
+            lines: list of str -- Links to the indexed notes.
+        
+        The page names have been claimed when building the link index.
+        """
+        pageCount = self._get_page_count(len(lines))
+        if pageCount == 1:
+            self._write_note(uid, fileName, '\n'.join(lines))
+            return
+
+        fileNames = self._linkIndex.fileNames
+        pageNames = [fileName] + [fileNames.get(f'{uid}:{i}', f'{fileName}_{i}') for i in range(2, pageCount + 1)]
+        for i, pageName in enumerate(pageNames):
+            navigation = []
+            if i > 0:
+                navigation.append(f'[[{pageNames[i - 1]}|<< previous]]')
+            navigation.append(f'page {i + 1} of {pageCount}')
+            if i < pageCount - 1:
+                navigation.append(f'[[{pageNames[i + 1]}|next >>]]')
+            navigation = ' | '.join(navigation)
+            pageLines = lines[i * self.pageSize:(i + 1) * self.pageSize]
+            text = '\n'.join([navigation, ''] + pageLines + ['', navigation])
+            pageUid = uid if i == 0 else f'{uid}:{i + 1}'
+            self._write_note(pageUid, pageName, text)
+
+    def _write_manifest(self):
+        """Save the file names and content hashes of the current run in the Obsidian folder, if they have changed."""
+        import json
+
+        if self._newManifest == self._manifest:
+            return
+
+        self.sink.write(self.MANIFEST_FILE, json.dumps({'notes': self._newManifest}, sort_keys=True))
+
+    def _write_note(self, uid: str, fileName: str, text: str):
+        """Write a Markdown note, skipping it if unchanged in incremental mode.
         
         Positional arguments:
-            filePath: str -- Path of the file to write.
+            uid: str -- GUID of the note's element, or the index page name.
+            fileName: str -- Path relative to the Obsidian folder, without extension.
             text: str -- File content.
-            
-        Return a success message.
+        
+        The file name is added to the manifest; in incremental mode, also the content hash.
         """
-        backedUp = False
-        if os.path.isfile(filePath):
-            try:
-                os.replace(filePath, f'{filePath}.bak')
-                backedUp = True
-            except Exception as ex:
-                raise Exception(f'Error: Cannot overwrite "{os.path.normpath(filePath)}": {str(ex)}.')
+        path = f'{fileName}.md'
+        if not self.incremental:
+            self._newManifest[uid] = [fileName, None]
+            self.sink.write(path, text)
+            return
 
-        try:
-            with open(filePath, 'w', encoding='utf-8') as f:
-                f.write(text)
-        except Exception as ex:
-            if backedUp:
-                os.replace(f'{filePath}.bak', self.filePath)
-            raise Exception(f'Error: Cannot write "{os.path.normpath(filePath)}": {str(ex)}.')
-
-        return f'"{os.path.normpath(filePath)}" written.'
+        entry = [fileName, self._blake2b(text.encode('utf-8'), digest_size=16).hexdigest()]
+        self._newManifest[uid] = entry
+        if self._manifest.get(uid) == entry and self.sink.exists(path):
+            with self._lock:
+                self._skipped += 1
+            if instrumentation.enabled:
+                instrumentation.count('files skipped')
+            return
+
+        self.sink.write(path, text)
+
+    def _write_notes(self, notes: list):
+        """Render and write notes one after another.
+        
+        Positional arguments:
+            notes: list of (uid, file path, content builder, builder argument) tuples.
+        """
+        for uid, fileName, build, element in notes:
+            self._write_note(uid, fileName, build(element))
+
+    def _write_notes_parallel(self, notes: list):
+        """Render and write notes using a pool of worker threads.
+        
+        Positional arguments:
+            notes: list of (uid, file path, content builder, builder argument) tuples.
+        
+        Notes sharing a file path are processed in order by the same worker, 
+        so the result is the same as with sequential writing.
+        Raise an exception listing all errors that occurred in the workers.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        noteGroups = {}
+        for note in notes:
+            noteGroups.setdefault(note[1], []).append(note)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self._write_notes, noteGroup) for noteGroup in noteGroups.values()]
+        errors = [str(future.exception()) for future in futures if future.exception() is not None]
+        if errors:
+            raise Exception('\n'.join(errors))
 
@@ -0,0 +1,208 @@
+"""Provide a class for an on-disk cache of parsed timelines.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+import os
+import time
+
+CACHE_VERSION = '7-@release'
+# format number and application version; entries of other versions are never loaded and age out
+
+
+def get_default_cache_dir() -> str:
+    """Return the platform's user cache directory for aeon2obsidian."""
+    if os.name == 'nt':
+        baseDir = os.environ.get('LOCALAPPDATA', os.path.expanduser('~'))
+    else:
+        baseDir = os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache'))
+    return os.path.join(baseDir, 'aeon2obsidian')
+
+
+class ParseCache:
+    """Store parsed Timeline instances as compressed pickles.
+    
+    Entries are keyed on the archive's content hash, the timeline's 
+    entity and event classes, and the cache version. The hash is only computed 
+    again if the archive's size or modification time has changed. When the 
+    total size exceeds the limit, the least recently used entries are removed.
+    
+    Size and last use of the entries are taken from the directory itself, 
+    so several processes can share the cache without a lock. 
+    The index only remembers the archive hashes; if an update of it is lost 
+    or it cannot be read, an archive is just hashed again.
+    
+    Only use cache directories that no one else can write to, 
+    because loading a pickle can execute code.
+    """
+    INDEX_FILE = 'index.json'
+    ENTRY_EXTENSION = '.bin'
+    TEMP_EXTENSION = '.tmp'
+
+    TEMP_MAX_AGE = 3600
+    # seconds after which a temporary file is considered left over by a crashed process
+
+    def __init__(self, cacheDir: str, maxBytes: int = 256 * 1024 * 1024):
+        """Set the cache directory and the size limit.
+        
+        Positional arguments:
+            cacheDir -- str: Path of the cache directory; created if missing.
+        
+        Optional arguments:
+            maxBytes -- int: Maximum total size of the cache entries.
+        """
+        self.cacheDir = cacheDir
+        self.maxBytes = maxBytes
+
+    def load(self, filePath: str, timeline, variant: str = ''):
+        """Return the cached timeline of an archive, or None.
+        
+        Positional arguments:
+            filePath -- str: Path of the .aeonzip file.
+            timeline -- Timeline instance whose strategies the cached timeline must match.
+        
+        Optional arguments:
+            variant -- str: Description of further reading options the cached timeline must match.
+        """
+        import pickle
+        import zlib
+
+        entryPath = self._get_entry_path(self._get_key(filePath, timeline, variant))
+        try:
+            with open(entryPath, 'rb') as f:
+                cachedTimeline = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+
+        except Exception:
+            self._remove(entryPath)
+            return None
+
+        try:
+            # Mark the entry as recently used.
+            os.utime(entryPath)
+        except OSError:
+            pass
+        return cachedTimeline
+
+    def store(self, filePath: str, timeline, variant: str = ''):
+        """Add a parsed timeline to the cache, evicting old entries if necessary.
+        
+        Positional arguments:
+            filePath -- str: Path of the .aeonzip file.
+            timeline -- Timeline instance read from the file.
+        
+        Optional arguments:
+            variant -- str: Description of further reading options.
+        """
+        import pickle
+        import zlib
+
+        entryPath = self._get_entry_path(self._get_key(filePath, timeline, variant))
+        data = zlib.compress(pickle.dumps(timeline, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        if len(data) > self.maxBytes:
+            return
+
+        tmpPath = f'{entryPath}.{os.getpid()}{self.TEMP_EXTENSION}'
+        with open(tmpPath, 'wb') as f:
+            f.write(data)
+        os.replace(tmpPath, entryPath)
+        self._evict()
+
+    def _evict(self):
+        """Remove the least recently used entries until the cache fits the size limit.
+        
+        Also remove temporary files left over by crashed processes.
+        """
+        entries = []
+        totalBytes = 0
+        now = time.time()
+        with os.scandir(self.cacheDir) as dirEntries:
+            for dirEntry in dirEntries:
+                try:
+                    stat = dirEntry.stat()
+                except OSError:
+                    # removed by another process
+                    continue
+
+                if dirEntry.name.endswith(self.ENTRY_EXTENSION):
+                    entries.append((stat.st_mtime, stat.st_size, dirEntry.path))
+                    totalBytes += stat.st_size
+                elif dirEntry.name.endswith(self.TEMP_EXTENSION) and now - stat.st_mtime > self.TEMP_MAX_AGE:
+                    self._remove(dirEntry.path)
+        entries.sort()
+        for __, size, entryPath in entries:
+            if totalBytes <= self.maxBytes:
+                break
+
+            totalBytes -= size
+            self._remove(entryPath)
+
+    def _get_entry_path(self, key: str) -> str:
+        return os.path.join(self.cacheDir, f'{key}{self.ENTRY_EXTENSION}')
+
+    def _get_key(self, filePath: str, timeline, variant: str) -> str:
+        """Return the cache key of an archive, a timeline's strategies, and the reading options.
+        
+        Remember the archive's size, modification time, and hash in the index.
+        """
+        import hashlib
+
+        index = self._read_index()
+        archivePath = os.path.abspath(filePath)
+        stat = os.stat(archivePath)
+        archive = index['archives'].get(archivePath, None)
+        if archive is not None and archive[0] == stat.st_size and archive[1] == stat.st_mtime_ns:
+            contentHash = archive[2]
+        else:
+            contentHash = self._hash_file(archivePath)
+            index['archives'][archivePath] = [stat.st_size, stat.st_mtime_ns, contentHash]
+            self._write_index(index)
+        strategies = (f'{CACHE_VERSION}|{timeline.entityClass.__module__}.{timeline.entityClass.__qualname__}'
+                      f'|{timeline.eventClass.__module__}.{timeline.eventClass.__qualname__}|{variant}')
+        strategyHash = hashlib.blake2b(strategies.encode('utf-8'), digest_size=4).hexdigest()
+        return f'{contentHash}-{strategyHash}'
+
+    def _hash_file(self, filePath: str) -> str:
+        """Return a hash of the file content."""
+        import hashlib
+
+        fileHash = hashlib.blake2b(digest_size=20)
+        with open(filePath, 'rb') as f:
+            for chunk in iter(lambda: f.read(0x100000), b''):
+                fileHash.update(chunk)
+        return fileHash.hexdigest()
+
+    def _read_index(self) -> dict:
+        """Return the index of archive hashes; an empty one if it is outdated or unreadable."""
+        import json
+
+        os.makedirs(self.cacheDir, exist_ok=True)
+        try:
+            with open(os.path.join(self.cacheDir, self.INDEX_FILE), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index['version'] == CACHE_VERSION and type(index['archives']) is dict:
+                return index
+
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        return {'version': CACHE_VERSION, 'archives': {}}
+
+    def _remove(self, filePath: str):
+        """Remove a file, if it has not been removed by another process."""
+        try:
+            os.remove(filePath)
+        except OSError:
+            pass
+
+    def _write_index(self, index: dict):
+        """Save the index atomically."""
+        import json
+
+        indexPath = os.path.join(self.cacheDir, self.INDEX_FILE)
+        tmpPath = f'{indexPath}.{os.getpid()}{self.TEMP_EXTENSION}'
+        with open(tmpPath, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmpPath, indexPath)
@@ -0,0 +1,205 @@
+"""Provide a class for replacing the notes in the Obsidian folder all at once.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+import os
+import threading
+from aeon2obsidianlib.file_sink import FileSink
+from aeon2obsidianlib.instrumentation import instrumentation
+
+
+class SnapshotSink(FileSink):
+    """Write notes to a staging folder and move them into the Obsidian folder when the export is complete.
+
+    Before the notes are moved, the files they replace or remove are saved
+    in a compressed snapshot, which restore() puts back.
+    If the export fails, the Obsidian folder is left unchanged.
+    """
+    STAGING_FOLDER = '.aeon2obsidian-staging'
+    SNAPSHOT_FOLDER = '.aeon2obsidian-snapshots'
+    # hidden folders inside the Obsidian folder, not indexed by Obsidian
+
+    SNAPSHOT_INDEX = '.aeon2obsidian-snapshot.json'
+    # member of the snapshot listing the files that did not exist before the export
+
+    def __init__(self, folderPath: str):
+        """Set the Obsidian folder."""
+        super().__init__(folderPath)
+        self.stagingPath = f'{folderPath}/{self.STAGING_FOLDER}'
+        self.snapshotPath = f'{folderPath}/{self.SNAPSHOT_FOLDER}'
+
+        self.keep = 5
+        # number of snapshots to keep; older ones are deleted after an export
+
+        self._folders: set[str] = set()
+        self._staged: set[str] = set()
+        self._removed: set[str] = set()
+        self._lock = threading.Lock()
+
+    def open(self):
+        """Create an empty staging folder."""
+        import shutil
+
+        self._folders.clear()
+        self._staged.clear()
+        self._removed.clear()
+        shutil.rmtree(self.stagingPath, ignore_errors=True)
+        try:
+            os.makedirs(self.stagingPath)
+        except Exception as ex:
+            raise Exception(f'Error: Cannot create "{os.path.normpath(self.stagingPath)}": {str(ex)}.')
+
+    def close(self):
+        """Save a snapshot, then move the staged notes into the Obsidian folder.
+
+        If a note cannot be moved, restore the snapshot and raise an exception.
+        """
+        import shutil
+
+        try:
+            if self._staged or self._removed:
+                self._commit()
+        finally:
+            shutil.rmtree(self.stagingPath, ignore_errors=True)
+        self._prune_snapshots()
+
+    def abort(self):
+        """Discard the staged notes."""
+        import shutil
+
+        shutil.rmtree(self.stagingPath, ignore_errors=True)
+
+    def make_folders(self, folders: set[str]):
+        self._folders.update(folders)
+        for folder in folders:
+            os.makedirs(f'{self.stagingPath}/{folder}', exist_ok=True)
+
+    def remove(self, path: str):
+        """Mark a file for removal when the export is complete."""
+        with self._lock:
+            self._removed.add(path)
+
+    def write(self, path: str, text: str):
+        """Write a file to the staging folder."""
+        filePath = f'{self.stagingPath}/{path}'
+        try:
+            with open(filePath, 'w', encoding='utf-8') as f:
+                f.write(text)
+        except Exception as ex:
+            raise Exception(f'Error: Cannot write "{os.path.normpath(filePath)}": {str(ex)}.')
+
+        with self._lock:
+            self._staged.add(path)
+        if instrumentation.enabled:
+            instrumentation.count('files written')
+            instrumentation.count('bytes written', len(text.encode('utf-8')))
+
+    def get_snapshots(self) -> list[str]:
+        """Return the paths of the snapshots, oldest first."""
+        import glob
+
+        return sorted(glob.glob(f'{self.snapshotPath}/*.zip'))
+
+    def restore(self, snapshotPath: str = None) -> str:
+        """Put back the files saved in a snapshot, and delete the snapshot.
+
+        Optional arguments:
+            snapshotPath: str -- Path of the snapshot. Default: the latest snapshot.
+
+        Files created by the export that saved the snapshot are removed.
+        Since the snapshot is deleted, repeated restores step back through the snapshots.
+        Return a success message.
+        """
+        import json
+        import shutil
+        import zipfile
+
+        if snapshotPath is None:
+            snapshots = self.get_snapshots()
+            if not snapshots:
+                raise Exception(f'Error: No snapshot found in "{os.path.normpath(self.folderPath)}".')
+
+            snapshotPath = snapshots[-1]
+        try:
+            with zipfile.ZipFile(snapshotPath) as snapshot:
+                for path in json.loads(snapshot.read(self.SNAPSHOT_INDEX))['created']:
+                    try:
+                        os.remove(f'{self.folderPath}/{path}')
+                    except FileNotFoundError:
+                        pass
+                restored = 0
+                for memberInfo in snapshot.infolist():
+                    if memberInfo.filename == self.SNAPSHOT_INDEX or memberInfo.is_dir():
+                        continue
+
+                    filePath = f'{self.folderPath}/{memberInfo.filename}'
+                    os.makedirs(os.path.dirname(filePath), exist_ok=True)
+                    with snapshot.open(memberInfo) as source, open(filePath, 'wb') as f:
+                        shutil.copyfileobj(source, f)
+                    restored += 1
+            os.remove(snapshotPath)
+        except Exception as ex:
+            raise Exception(f'Error: Cannot restore "{os.path.normpath(snapshotPath)}": {str(ex)}.')
+
+        return f'{restored} files restored from "{os.path.normpath(snapshotPath)}".'
+
+    def _commit(self):
+        """Save a snapshot, then move the staged notes into the Obsidian folder."""
+        snapshotPath = self._write_snapshot()
+        try:
+            for folder in self._folders:
+                os.makedirs(f'{self.folderPath}/{folder}', exist_ok=True)
+            for path in self._staged:
+                os.replace(f'{self.stagingPath}/{path}', f'{self.folderPath}/{path}')
+            for path in self._removed - self._staged:
+                try:
+                    os.remove(f'{self.folderPath}/{path}')
+                except FileNotFoundError:
+                    pass
+        except Exception as ex:
+            self.restore(snapshotPath)
+            raise Exception(f'Error: Cannot update "{os.path.normpath(self.folderPath)}": {str(ex)}; '
+                            'the previous files have been restored.')
+
+    def _prune_snapshots(self):
+        """Delete the oldest snapshots, keeping the latest ones."""
+        for snapshotPath in self.get_snapshots()[:-self.keep or None]:
+            try:
+                os.remove(snapshotPath)
+            except OSError:
+                pass
+
+    def _write_snapshot(self) -> str:
+        """Save the files to be replaced or removed in a compressed snapshot.
+
+        Return the path of the snapshot.
+        """
+        from datetime import datetime
+        import json
+        import zipfile
+
+        os.makedirs(self.snapshotPath, exist_ok=True)
+        snapshotPath = f'{self.snapshotPath}/{datetime.now().strftime("%Y%m%d-%H%M%S-%f")}.zip'
+        created = []
+        saved = 0
+        try:
+            with zipfile.ZipFile(snapshotPath, 'w', compression=zipfile.ZIP_DEFLATED) as snapshot:
+                for path in sorted(self._staged | self._removed):
+                    try:
+                        snapshot.write(f'{self.folderPath}/{path}', path)
+                        saved += 1
+                    except FileNotFoundError:
+                        created.append(path)
+                snapshot.writestr(self.SNAPSHOT_INDEX, json.dumps({'created': created}))
+        except Exception as ex:
+            try:
+                os.remove(snapshotPath)
+            except OSError:
+                pass
+            raise Exception(f'Error: Cannot write "{os.path.normpath(snapshotPath)}": {str(ex)}.')
+
+        if instrumentation.enabled:
+            instrumentation.count('files backed up', saved)
+        return snapshotPath
@@ -22,6 +22,9 @@ class Timeline:
         self.roles: dict[str, str] = {}
         # key: ID, value: name
 
+        self.roleTypes: dict[str, str] = {}
+        # key: role ID, value: ID of the entity type the role belongs to
+
         self.properties: dict[str, str] = {}
         # key: ID, value: name
 
@@ -33,3 +36,12 @@ class Timeline:
 
         self.entitiesByType: dict[str, list[str]] = {}
         # key: type ID, value: list of entity IDs
+
+        self.appearances: dict[str, list[tuple[str, str]]] = {}
+        # key: entity ID, value: list of (event ID, role ID) in reading order
+
+        self.skippedEntities: dict[str, tuple[str, str]] = {}
+        # key: ID of an entity excluded by the export filter, value: (name, type ID)
+
+        self.skippedEvents: dict[str, tuple[str, float]] = {}
+        # key: ID of an event excluded by the export filter, value: (title, Aeon 2 timestamp or None)
@@ -0,0 +1,211 @@
+"""Provide a class for merging the timelines of several Aeon Timeline 2 projects.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+import os
+import time
+from aeon2obsidianlib.instrumentation import instrumentation
+from aeon2obsidianlib.timeline import Timeline
+from aeon2obsidianlib.tuple_map import TupleMap
+
+
+class TimelineMerger:
+    """Merge several timelines into one, so that shared elements get a single note.
+
+    Types, roles, properties, and entities are matched by GUID.
+    Elements whose GUID is new are matched by name with the elements
+    of the projects merged before; roles and entities by type and name.
+    Names are compared case-insensitively, using hash indexes,
+    so the merging time grows linearly with the total size.
+    Elements of the same project are never merged with each other.
+    Events are matched by GUID only; the first project's version is kept.
+    The names of the elements excluded by the export filter are kept likewise,
+    so that the file names do not depend on the filter.
+    """
+
+    def __init__(self, timeline: Timeline):
+        """Set the timeline receiving the merged data.
+
+        Positional arguments:
+            timeline: Timeline instance, usually empty.
+        """
+        self.timeline = timeline
+
+        self.shared = 0
+        # number of entities found in more than one project
+
+        self.duplicateEvents = 0
+        # number of events skipped, because an earlier project has an event with the same GUID
+
+        self._typesByName: dict[str, str] = {}
+        self._propertiesByName: dict[str, str] = {}
+        # key: casefolded name, value: ID in the merged timeline
+        self._rolesByName: dict[tuple[str, str], str] = {}
+        # key: (type ID in the merged timeline, casefolded name), value: ID in the merged timeline
+        self._entitiesByName: dict[tuple[str, str], str] = {}
+        # key: (type ID in the merged timeline, casefolded name), value: ID in the merged timeline
+        self._skippedByName: dict[tuple[str, str], str] = {}
+        # key: (type ID in the merged timeline, casefolded name), value: ID of an entity excluded by the export filter
+
+    def add(self, timeline: Timeline):
+        """Merge a project's timeline into the merged timeline.
+
+        Positional arguments:
+            timeline: Timeline instance of the project.
+
+        The project's event instances are taken over; their IDs may be changed.
+        """
+        typeMap = self._merge_names(timeline.types, self.timeline.types, self._typesByName)
+        roleTypes = {roleId: typeMap.get(typeId, typeId) for roleId, typeId in timeline.roleTypes.items()}
+        roleMap = self._merge_names(timeline.roles, self.timeline.roles, self._rolesByName, roleTypes)
+        for roleId, typeId in roleTypes.items():
+            if roleId not in roleMap:
+                self.timeline.roleTypes.setdefault(roleId, typeId)
+        propertyMap = self._merge_names(timeline.properties, self.timeline.properties, self._propertiesByName)
+        for typeId in timeline.types:
+            self.timeline.entitiesByType.setdefault(typeMap.get(typeId, typeId), [])
+
+        #--- Merge the entities.
+        entityMap = {}
+        newNames = []
+        for uid, entity in timeline.entities.items():
+            typeId = typeMap.get(entity.entityType, entity.entityType)
+            nameKey = (typeId, entity.name.casefold())
+            mergedId = uid if uid in self.timeline.entities else self._entitiesByName.get(nameKey, None)
+            if mergedId is None:
+                entity.entityType = typeId
+                self.timeline.entities[uid] = entity
+                self.timeline.entitiesByType[typeId].append(uid)
+                newNames.append((nameKey, uid))
+                skippedId = self._skippedByName.pop(nameKey, None)
+                if skippedId is not None:
+                    # Without the filter, the entity would have been merged with the excluded one.
+                    del self.timeline.skippedEntities[skippedId]
+                continue
+
+            mergedEntity = self.timeline.entities[mergedId]
+            if not mergedEntity.notes and entity.notes:
+                mergedEntity.notes = entity.notes
+            if mergedId != uid:
+                entityMap[uid] = mergedId
+            self.shared += 1
+
+        #--- Keep the names of the excluded entities that would not be merged with an earlier project's entity.
+        newSkippedNames = []
+        for uid, (name, typeId) in timeline.skippedEntities.items():
+            typeId = typeMap.get(typeId, typeId)
+            nameKey = (typeId, name.casefold())
+            if (uid in self.timeline.entities or uid in self.timeline.skippedEntities
+                    or nameKey in self._entitiesByName or nameKey in self._skippedByName):
+                continue
+
+            self.timeline.skippedEntities[uid] = (name, typeId)
+            newSkippedNames.append((nameKey, uid))
+        for nameKey, uid in newSkippedNames:
+            self._skippedByName.setdefault(nameKey, uid)
+        for nameKey, uid in newNames:
+            self._entitiesByName.setdefault(nameKey, uid)
+
+        #--- Merge the events.
+        remap = bool(roleMap or entityMap or propertyMap)
+        for uid, event in timeline.events.items():
+            if uid in self.timeline.events:
+                self.duplicateEvents += 1
+                continue
+
+            if remap:
+                self._remap_event(event, roleMap, entityMap, propertyMap)
+            self.timeline.events[uid] = event
+            for roleId in event.relationships:
+                for entityId in event.relationships[roleId]:
+                    self.timeline.appearances.setdefault(entityId, []).append((uid, roleId))
+        for uid, skippedEvent in timeline.skippedEvents.items():
+            self.timeline.skippedEvents.setdefault(uid, skippedEvent)
+
+    def read(self, sourcePaths: list[str], readTimeline, processes: int = None) -> str:
+        """Read the projects concurrently, and merge them in the order given.
+
+        Positional arguments:
+            sourcePaths: list of .aeonzip file paths.
+            readTimeline -- Picklable function taking a source path and returning a Timeline instance.
+
+        Optional arguments:
+            processes: int -- Number of worker processes. Default: number of CPUs.
+
+        Each project is merged as soon as it and the projects before it are read.
+        Raise an exception if a project cannot be read.
+        Return a summary with a line per project.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        startTime = time.perf_counter()
+        lines = []
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            for sourcePath, timeline in zip(sourcePaths, executor.map(readTimeline, sourcePaths)):
+                lines.append(f'{os.path.normpath(sourcePath)}: '
+                             f'{len(timeline.entities)} entities, {len(timeline.events)} events.')
+                with instrumentation.stage('TimelineMerger.add'):
+                    self.add(timeline)
+        lines.append(
+            f'{len(sourcePaths)} projects merged in {time.perf_counter() - startTime:.2f}s: '
+            f'{len(self.timeline.entities)} entities ({self.shared} shared), '
+            f'{len(self.timeline.events)} events ({self.duplicateEvents} duplicates skipped).'
+            )
+        if instrumentation.enabled:
+            instrumentation.count('entities shared', self.shared)
+            instrumentation.count('events skipped', self.duplicateEvents)
+        return '\n'.join(lines)
+
+    def _merge_names(self, names: dict[str, str], mergedNames: dict[str, str],
+                     mergedIds: dict, scopes: dict[str, str] = None) -> dict[str, str]:
+        """Merge a project's types, roles, or properties.
+
+        Positional arguments:
+            names: dict -- key: ID in the project, value: name.
+            mergedNames: dict -- key: ID in the merged timeline, value: name.
+            mergedIds: dict -- Name index of the merged timeline; key: casefolded name, value: ID.
+
+        Optional arguments:
+            scopes: dict -- key: ID in the project, value: merged ID of the element the name belongs to.
+                            If given, the keys of mergedIds are (scope, casefolded name) tuples.
+
+        Return a dictionary mapping the project's IDs to differing IDs in the merged timeline.
+        """
+        idMap = {}
+        newNames = []
+        for uid, name in names.items():
+            if uid in mergedNames:
+                continue
+
+            nameKey = name.casefold() if scopes is None else (scopes.get(uid, None), name.casefold())
+            mergedId = mergedIds.get(nameKey, None)
+            if mergedId is None:
+                mergedNames[uid] = name
+                newNames.append((nameKey, uid))
+            else:
+                idMap[uid] = mergedId
+        for name, uid in newNames:
+            mergedIds.setdefault(name, uid)
+        return idMap
+
+    def _remap_event(self, event, roleMap: dict[str, str], entityMap: dict[str, str], propertyMap: dict[str, str]):
+        """Replace the event's role, entity, and property IDs with the IDs of the merged timeline."""
+        relationships = {}
+        for roleId in event.relationships:
+            entityIds = relationships.setdefault(roleMap.get(roleId, roleId), [])
+            for entityId in event.relationships[roleId]:
+                entityId = entityMap.get(entityId, entityId)
+                if entityId not in entityIds:
+                    entityIds.append(entityId)
+        values = {propertyMap.get(propertyId, propertyId): event.values[propertyId] for propertyId in event.values}
+        if isinstance(event.relationships, TupleMap):
+            event.relationships = TupleMap(
+                tuple(relationships),
+                tuple(tuple(entityIds) for entityIds in relationships.values())
+                )
+            event.values = TupleMap(tuple(values), tuple(values.values()))
+        else:
+            event.relationships = relationships
+            event.values = values
@@ -0,0 +1,39 @@
+"""Provide a compact read-only mapping backed by tuples.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+from collections.abc import Mapping
+
+
+class TupleMap(Mapping):
+    """Read-only mapping for a few items, using much less memory than a dict.
+    
+    Lookup is linear, which is faster than hashing for the handful of 
+    roles or properties an event usually has.
+    """
+    __slots__ = ('_keys', '_values')
+
+    def __init__(self, keys: tuple = (), values: tuple = ()):
+        self._keys = keys
+        self._values = values
+
+    def __getitem__(self, key):
+        try:
+            return self._values[self._keys.index(key)]
+
+        except ValueError:
+            raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({dict(zip(self._keys, self._values))})'
@@ -0,0 +1,179 @@
+"""Measure the throughput of the conversion stages with a synthetic timeline.
+
+usage: benchmark.py [-h] [--entities N] [--events N] [--types N] [--roles N]
+                    [--properties N] [--tags N] [--relationships N]
+                    [--undated N] [--seed N] [--repeat N] [--no-memory]
+                    [--compact] [--output FILE]
+
+The results are written as JSON, to be compared between releases.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+import argparse
+from contextlib import redirect_stdout
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, f'{os.path.dirname(os.path.abspath(__file__))}/../src')
+from aeon2obsidianlib.aeon2_file import Aeon2File
+from aeon2obsidianlib.aeon2_fop import open_timeline
+from aeon2obsidianlib.compact_entity import CompactEntity
+from aeon2obsidianlib.compact_event import CompactEvent
+from aeon2obsidianlib.memory_sink import MemorySink
+from aeon2obsidianlib.obsidian_files import ObsidianFiles
+from aeon2obsidianlib.timeline import Timeline
+from timeline_generator import add_size_arguments
+from timeline_generator import get_sizes
+from timeline_generator import write_aeonzip
+
+
+class Benchmark:
+    """Run the conversion stages one by one on a project file.
+    
+    Each stage method prepares the data for the next stage.
+    """
+    STAGES = (
+        'open_timeline',
+        'read',
+        'build_link_index',
+        'sort_events',
+        'build_index',
+        'render_notes',
+        'write_notes',
+        )
+
+    def __init__(self, sourcePath: str, workDir: str, compact: bool = False):
+        self.sourcePath = sourcePath
+        self.workDir = workDir
+        self.compact = compact
+        self.timeline = None
+        self.linkIndex = None
+        self.appearances = None
+        self.chronology = None
+        self.neighbors = None
+        self.notes = None
+        self.texts = None
+        self.counts = {}
+        self._runs = 0
+
+    def open_timeline(self):
+        jsonData = open_timeline(self.sourcePath)
+        self.counts['entities'] = len(jsonData['entities'])
+        self.counts['events'] = len(jsonData['events'])
+
+    def read(self):
+        aeon2File = Aeon2File(self.sourcePath)
+        aeon2File.timeline = Timeline()
+        if self.compact:
+            aeon2File.timeline.entityClass = CompactEntity
+            aeon2File.timeline.eventClass = CompactEvent
+        aeon2File.read()
+        self.timeline = aeon2File.timeline
+
+    def build_link_index(self):
+        obsidianFiles = self._new_obsidian_files()
+        obsidianFiles._build_link_index()
+        self.linkIndex = obsidianFiles._linkIndex
+
+    def sort_events(self):
+        obsidianFiles = self._new_obsidian_files()
+        obsidianFiles._sort_events()
+        self.appearances = obsidianFiles._appearances
+        self.chronology = obsidianFiles._chronology
+        self.neighbors = obsidianFiles._neighbors
+
+    def build_index(self):
+        obsidianFiles = self._new_obsidian_files()
+        obsidianFiles.sink = MemorySink()
+        obsidianFiles._build_index()
+
+    def render_notes(self):
+        obsidianFiles = self._new_obsidian_files()
+        self.notes = obsidianFiles._collect_notes()
+        self.texts = [build(element) for __, __, build, element in self.notes]
+        self.counts['notes'] = len(self.texts)
+        self.counts['bytes'] = sum(len(text.encode('utf-8')) for text in self.texts)
+
+    def write_notes(self):
+        obsidianFiles = self._new_obsidian_files()
+        for (uid, fileName, __, __), text in zip(self.notes, self.texts):
+            obsidianFiles._write_note(uid, fileName, text)
+
+    def run(self, repeat: int = 3, memory: bool = True) -> dict:
+        """Return a dictionary with the best time and the peak memory of each stage."""
+        results = {}
+        for stage in self.STAGES:
+            stageFunction = getattr(self, stage)
+            seconds = []
+            for __ in range(repeat):
+                startTime = time.perf_counter()
+                stageFunction()
+                seconds.append(time.perf_counter() - startTime)
+            results[stage] = {'seconds': min(seconds)}
+            if memory:
+                tracemalloc.start()
+                stageFunction()
+                results[stage]['peakBytes'] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+        return results
+
+    def _new_obsidian_files(self) -> ObsidianFiles:
+        """Return an ObsidianFiles instance writing to an empty folder."""
+        self._runs += 1
+        obsidianFiles = ObsidianFiles(f'{self.workDir}/vault{self._runs}')
+        os.makedirs(obsidianFiles.folderPath)
+        obsidianFiles.timeline = self.timeline
+        obsidianFiles._linkIndex = self.linkIndex
+        obsidianFiles._appearances = self.appearances
+        obsidianFiles._chronology = self.chronology
+        obsidianFiles._neighbors = self.neighbors
+        return obsidianFiles
+
+
+def run(sizes: dict, repeat: int = 3, memory: bool = True, compact: bool = False) -> dict:
+    """Generate a timeline, run the benchmark, and return the report."""
+    with tempfile.TemporaryDirectory() as workDir:
+        sourcePath = f'{workDir}/benchmark.aeonzip'
+        write_aeonzip(sourcePath, **sizes)
+        benchmark = Benchmark(sourcePath, workDir, compact)
+        with redirect_stdout(io.StringIO()):
+            stages = benchmark.run(repeat, memory)
+        return {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'parameters': dict(sizes, repeat=repeat, compact=compact),
+            'archiveBytes': os.path.getsize(sourcePath),
+            'counts': benchmark.counts,
+            'stages': stages,
+            }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Measure the throughput of the conversion stages with a synthetic timeline.'
+        )
+    add_size_arguments(parser)
+    parser.add_argument('--repeat', metavar='N', type=int, default=3,
+                        help='Number of runs per stage; the best time is reported.')
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help='Do not measure the peak memory of the stages.')
+    parser.add_argument('--compact', action='store_true',
+                        help='Use the memory saving entity and event classes.')
+    parser.add_argument('--output', metavar='FILE',
+                        help='Write the JSON report to a file instead of stdout.')
+    args = parser.parse_args()
+    report = run(get_sizes(args), args.repeat, args.memory, args.compact)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
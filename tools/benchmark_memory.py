@@ -0,0 +1,85 @@
+"""Compare the memory usage of the standard and the compact timeline model.
+
+usage: benchmark_memory.py [-h] [--entities N] [--events N]
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, f'{os.path.dirname(os.path.abspath(__file__))}/../src')
+from aeon2obsidianlib.compact_entity import CompactEntity
+from aeon2obsidianlib.compact_event import CompactEvent
+from aeon2obsidianlib.entity import Entity
+from aeon2obsidianlib.event import Event
+
+DATE_GUID = 'date-guid'
+ROLES = [f'role-guid-{i}' for i in range(8)]
+PROPERTIES = [f'property-guid-{i}' for i in range(4)]
+TAGS = [f'Tag {i}' for i in range(20)]
+
+
+def json_entity(i):
+    """Return a synthetic Aeon 2 JSON entity."""
+    return {'guid': f'entity-guid-{i}', 'name': f'Entity {i}', 'entityType': 'type-guid', 'notes': f'Notes {i}'}
+
+
+def json_event(i, numEntities):
+    """Return a synthetic Aeon 2 JSON event."""
+    return {
+        'guid': f'event-guid-{i}',
+        'title': f'Event {i}',
+        'rangeValues': [{
+            'rangeProperty': DATE_GUID,
+            'position': {'timestamp': 61000000000 + i * 3600},
+            'span': {'days': i % 5, 'minutes': i % 90},
+            }],
+        'relationships': [
+            {'role': ROLES[(i + j) % len(ROLES)], 'entity': f'entity-guid-{(i * 7 + j) % numEntities}'}
+            for j in range(3)
+            ],
+        'values': [{'property': propertyId, 'value': f'Value {i}'} for propertyId in PROPERTIES[:2]],
+        'tags': [TAGS[i % len(TAGS)], TAGS[(i + 1) % len(TAGS)]],
+        }
+
+
+def measure(entityClass, eventClass, numEntities, numEvents):
+    """Return the bytes allocated by the model objects."""
+    gc.collect()
+    tracemalloc.start()
+    entities = {}
+    events = {}
+    for i in range(numEntities):
+        jsonEntity = json_entity(i)
+        entities[jsonEntity['guid']] = entityClass()
+        entities[jsonEntity['guid']].read(jsonEntity)
+    for i in range(numEvents):
+        jsonEvent = json_event(i, numEntities)
+        events[jsonEvent['guid']] = eventClass()
+        events[jsonEvent['guid']].read(jsonEvent, DATE_GUID)
+    gc.collect()
+    size, __ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def run(numEntities, numEvents):
+    """Print the memory usage of both models."""
+    standard = measure(Entity, Event, numEntities, numEvents)
+    compact = measure(CompactEntity, CompactEvent, numEntities, numEvents)
+    print(f'{numEntities} entities, {numEvents} events')
+    print(f'Entity/Event:               {standard / 1024 / 1024:8.1f} MiB')
+    print(f'CompactEntity/CompactEvent: {compact / 1024 / 1024:8.1f} MiB ({compact / standard:.0%})')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the memory usage of the timeline models.')
+    parser.add_argument('--entities', metavar='N', type=int, default=1000)
+    parser.add_argument('--events', metavar='N', type=int, default=100000)
+    args = parser.parse_args()
+    run(args.entities, args.events)
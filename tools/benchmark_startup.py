@@ -0,0 +1,108 @@
+"""Measure the start-up time of the command line application.
+
+usage: benchmark_startup.py [-h] [--repeat N] [--top N] [--max-ms MS]
+                            [--output FILE]
+                            [script]
+
+The script is started with "--help" under "python -X importtime",
+so only the imports and the argument parser are timed.
+The results are written as JSON, to be compared between releases.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+
+DEFAULT_SCRIPT = f'{os.path.dirname(os.path.abspath(__file__))}/../src/aeon2obsidian_.py'
+IMPORT_TIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+
+def measure(scriptPath: str) -> tuple:
+    """Start the script once and return the wall time and the import times.
+
+    Positional arguments:
+        scriptPath: str -- Path of the Python script to start.
+
+    Return a tuple: (wall time in ms, dict of top level modules: cumulative import time in ms).
+    """
+    startTime = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', scriptPath, '--help'],
+        capture_output=True,
+        text=True,
+        )
+    wallTime = (time.perf_counter() - startTime) * 1000
+    if process.returncode != 0:
+        raise Exception(f'Error: "{scriptPath}" failed:\n{process.stderr}')
+
+    imports = {}
+    for line in process.stderr.splitlines():
+        importTime = IMPORT_TIME.match(line)
+        if importTime is None:
+            continue
+
+        if importTime.group(3):
+            # Imported by another module; counted in its cumulative time.
+            continue
+
+        imports[importTime.group(4)] = int(importTime.group(2)) / 1000
+    return wallTime, imports
+
+
+def run(scriptPath: str, repeat: int = 5, top: int = 10) -> dict:
+    """Start the script several times and return the report.
+
+    The best time of all runs is reported for each module.
+    """
+    wallTimes = []
+    imports = {}
+    for __ in range(repeat):
+        wallTime, runImports = measure(scriptPath)
+        wallTimes.append(wallTime)
+        for moduleName, importTime in runImports.items():
+            imports[moduleName] = min(importTime, imports.get(moduleName, importTime))
+    slowest = sorted(imports.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'script': os.path.normpath(scriptPath),
+        'parameters': {'repeat': repeat},
+        'wallMs': round(min(wallTimes), 1),
+        'importMs': round(sum(imports.values()), 1),
+        'modules': len(imports),
+        'slowest': {moduleName: round(importTime, 2) for moduleName, importTime in slowest},
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Measure the start-up time of the command line application.'
+        )
+    parser.add_argument('script', nargs='?', default=DEFAULT_SCRIPT,
+                        help='Python script to start; default: the application in the source folder.')
+    parser.add_argument('--repeat', metavar='N', type=int, default=5,
+                        help='Number of starts; the best time is reported.')
+    parser.add_argument('--top', metavar='N', type=int, default=10,
+                        help='Number of top level imports to list.')
+    parser.add_argument('--max-ms', metavar='MS', type=float,
+                        help='Fail if the import time exceeds this budget.')
+    parser.add_argument('--output', metavar='FILE',
+                        help='Write the JSON report to a file instead of stdout.')
+    args = parser.parse_args()
+    report = run(args.script, args.repeat, args.top)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.max_ms is not None and report['importMs'] > args.max_ms:
+        sys.exit(f'Import time {report["importMs"]} ms exceeds the budget of {args.max_ms} ms.')
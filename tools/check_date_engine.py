@@ -0,0 +1,145 @@
+"""Check that the batched date engine gives the same results as the per-event calculation.
+
+usage: check_date_engine.py [-h] [--cases N] [--seed N]
+
+Random timestamps and spans, including invalid ones, are calculated
+with Event.set_date() and with DateEngine, in its pure Python and,
+if installed, its NumPy variant.
+Exit with status 1 if any result differs.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, f'{os.path.dirname(os.path.abspath(__file__))}/../src')
+from aeon2obsidianlib.date_engine import DateEngine
+from aeon2obsidianlib.date_engine import MAX_SECONDS
+from aeon2obsidianlib.date_engine import import_numpy
+from aeon2obsidianlib.event import Event
+
+SPAN_KEYS = ('years', 'months', 'weeks', 'days', 'hours', 'minutes', 'seconds')
+MARGIN = 31 * 86400
+# seconds around the limits of the valid timestamps
+
+
+def random_timestamp(rnd: random.Random):
+    """Return a timestamp, mostly valid, sometimes out of range or fractional."""
+    choice = rnd.random()
+    if choice < 0.6:
+        return rnd.randrange(0, MAX_SECONDS + 1)
+
+    if choice < 0.7:
+        # Near the end of a month.
+        day = rnd.randrange(0, MAX_SECONDS // 86400 - 40)
+        return (day - day % 365 + rnd.choice((30, 58, 59, 89, 119, 364))) * 86400 + rnd.randrange(86400)
+
+    if choice < 0.8:
+        return float(rnd.randrange(0, MAX_SECONDS + 1))
+
+    if choice < 0.85:
+        return rnd.uniform(0, MAX_SECONDS)
+
+    if choice < 0.9:
+        return rnd.randrange(-MARGIN, 0)
+
+    if choice < 0.95:
+        return rnd.randrange(MAX_SECONDS - MARGIN, MAX_SECONDS + MARGIN)
+
+    return rnd.choice((0, 1, 86399, 86400, MAX_SECONDS, MAX_SECONDS + 1, 0.5, -1))
+
+
+def random_span(rnd: random.Random) -> dict:
+    """Return a span with random keys; values are mostly small, sometimes large or negative."""
+    span = {}
+    for key in SPAN_KEYS:
+        if rnd.random() < 0.3:
+            choice = rnd.random()
+            if choice < 0.8:
+                span[key] = rnd.randrange(0, 40)
+            elif choice < 0.9:
+                span[key] = rnd.randrange(0, 20000)
+            else:
+                span[key] = rnd.randrange(-20, 0)
+    return span
+
+
+def calculate(timestamp, span: dict) -> tuple:
+    """Return the result of Event.set_date(), or the name of the exception raised."""
+    event = Event()
+    try:
+        event.set_date(timestamp, span)
+    except Exception as ex:
+        return ex.__class__.__name__
+
+    return event.date, event.time, event.lastsDays, event.lastsHours, event.lastsMinutes
+
+
+def calculate_batch(cases: list[tuple], useNumpy: bool) -> list:
+    """Return the results of DateEngine for the cases, like calculate().
+
+    The cases are calculated in one batch; if the batch raises an exception,
+    each case is calculated by a DateEngine of its own.
+    """
+    events = [Event() for __ in cases]
+    dateEngine = DateEngine()
+    dateEngine.useNumpy = useNumpy
+    for event, (timestamp, span) in zip(events, cases):
+        dateEngine.add(event, timestamp, span)
+    try:
+        dateEngine.run()
+    except Exception:
+        if len(cases) == 1:
+            raise
+
+        results = []
+        for case in cases:
+            try:
+                results.extend(calculate_batch([case], useNumpy))
+            except Exception as ex:
+                results.append(ex.__class__.__name__)
+        return results
+
+    return [(event.date, event.time, event.lastsDays, event.lastsHours, event.lastsMinutes) for event in events]
+
+
+def run(numCases: int, seed: int) -> int:
+    """Print the number of mismatches of each DateEngine variant, and return their total."""
+    rnd = random.Random(seed)
+    cases = [(random_timestamp(rnd), random_span(rnd)) for __ in range(numCases)]
+    expected = [calculate(timestamp, span) for timestamp, span in cases]
+    variants = [('Python', False)]
+    if import_numpy():
+        variants.append(('NumPy', True))
+    else:
+        print('NumPy is not installed; only the pure Python variant is checked.')
+    mismatches = 0
+    for variantName, useNumpy in variants:
+        # Split the cases, so that an error case only affects a part of the batches.
+        results = []
+        for start in range(0, numCases, 1000):
+            results.extend(calculate_batch(cases[start:start + 1000], useNumpy))
+        variantMismatches = 0
+        for case, result, expectedResult in zip(cases, results, expected):
+            if result != expectedResult:
+                if variantMismatches < 10:
+                    print(f'{variantName}: {case}: {result} instead of {expectedResult}')
+                variantMismatches += 1
+        print(f'{variantName}: {numCases} cases, {variantMismatches} mismatches.')
+        mismatches += variantMismatches
+    return mismatches
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Check that the batched date engine gives the same results as the per-event calculation.'
+        )
+    parser.add_argument('--cases', metavar='N', type=int, default=100000)
+    parser.add_argument('--seed', metavar='N', type=int, default=0)
+    args = parser.parse_args()
+    if run(args.cases, args.seed):
+        sys.exit(1)
@@ -52,13 +52,15 @@ def inline_module(file, package, packagePath, text, processedModules, copyPyWrit
                 if 'import' in line:
                     importModule = re.match('from (.+?) import.+', line)
                     if (importModule is not None) and (package in importModule.group(1)):
-                        packageName = re.sub('\.', '\/', importModule.group(1))
+                        packageName = importModule.group(1).replace('.', '/')
                         moduleName = f'{packagePath}{packageName}'
                         if not (moduleName in processedModules):
                             processedModules.append(moduleName)
                             text = inline_module(
                                 f'{moduleName}.py', package, packagePath, text, processedModules, copyPyWriter)
-                    elif line.lstrip().startswith('import'):
+                    elif line.startswith('import'):
+                        # Only top level imports are merged;
+                        # imports within functions are kept for lazy loading.
                         moduleName = line.replace('import ', '').rstrip()
                         if not (moduleName in processedModules):
                             processedModules.append(moduleName)
@@ -0,0 +1,166 @@
+"""Generate synthetic Aeon Timeline 2 projects for benchmarking.
+
+usage: timeline_generator.py [-h] [--entities N] [--events N] [--types N]
+                             [--roles N] [--properties N] [--tags N]
+                             [--relationships N] [--undated N] [--seed N]
+                             Targetfile
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/aeon2obsidian
+Published under the MIT License (https://opensource.org/licenses/mit-license.php)
+"""
+import argparse
+from datetime import datetime
+import json
+import random
+import zipfile
+
+DATE_GUID = 'date-guid'
+
+SPANS = (
+    {},
+    {'minutes': 45},
+    {'hours': 30},
+    {'days': 3, 'hours': 2},
+    {'weeks': 2},
+    {'months': 14, 'days': 3},
+    {'years': 1, 'seconds': 130},
+    )
+
+
+def generate_timeline(entities=1000, events=10000, types=4, roles=3, properties=4, tags=20,
+                      relationships=3, undated=10, seed=0) -> dict:
+    """Return a synthetic Aeon 2 JSON data structure.
+    
+    Optional arguments:
+        entities -- int: Number of entities.
+        events -- int: Number of events.
+        types -- int: Number of entity types.
+        roles -- int: Number of roles per entity type.
+        properties -- int: Number of event properties.
+        tags -- int: Number of distinct tags.
+        relationships -- int: Number of relationships per event.
+        undated -- int: Number of events without a date, included in events.
+        seed -- int: Seed of the random generator.
+    """
+    rnd = random.Random(seed)
+    typeGuids = [f'type-{i}' for i in range(types)]
+    roleGuids = [f'role-{i}-{j}' for i in range(types) for j in range(roles)]
+    propertyGuids = [f'property-{i}' for i in range(properties)]
+    tagNames = [f'Tag {i}' for i in range(tags)]
+    template = {
+        'rangeProperties': [
+            {'guid': DATE_GUID, 'type': 'date', 'calendar': {'eras': [{'name': 'BC'}, {'name': 'AD'}]}},
+            ],
+        'types': [
+            {
+                'guid': typeGuid,
+                'name': f'Type {i}',
+                'roles': [{'guid': f'role-{i}-{j}', 'name': f'Role {i}.{j}'} for j in range(roles)],
+                }
+            for i, typeGuid in enumerate(typeGuids)
+            ],
+        'properties': [{'guid': guid, 'name': f'Property {i}'} for i, guid in enumerate(propertyGuids)],
+        }
+    jsonEntities = [
+        {
+            'guid': f'entity-{i}',
+            'name': f'Entity {i}',
+            'entityType': typeGuids[i % types],
+            'notes': f'Notes on entity {i}.\nSecond line.',
+            }
+        for i in range(entities)
+        ]
+    undatedEvents = set(rnd.sample(range(events), min(undated, events)))
+    jsonEvents = []
+    for i in range(events):
+        if i not in undatedEvents:
+            timestamp = random_timestamp(rnd)
+        elif i % 2:
+            # No date at all.
+            timestamp = None
+        else:
+            # A date before 0001-01-01, which is not converted.
+            timestamp = -rnd.randrange(1, 10 ** 10)
+        jsonEvents.append({
+            'guid': f'event-{i}',
+            'title': f'Event {i}',
+            'rangeValues': [] if timestamp is None else [{
+                'rangeProperty': DATE_GUID,
+                'position': {'timestamp': timestamp},
+                'span': rnd.choice(SPANS),
+                }],
+            'relationships': [
+                {'role': rnd.choice(roleGuids), 'entity': f'entity-{rnd.randrange(entities)}'}
+                for __ in range(relationships if entities else 0)
+                ],
+            'values': [
+                {'property': guid, 'value': f'{guid} of event {i}.\nSecond line.'}
+                for guid in rnd.sample(propertyGuids, min(2, properties))
+                ],
+            'tags': rnd.sample(tagNames, min(2, tags)),
+            })
+    return {'template': template, 'entities': jsonEntities, 'events': jsonEvents}
+
+
+def random_timestamp(rnd) -> int:
+    """Return the seconds since 0001-01-01 of a random 20th century date.
+    
+    Days after the 28th are avoided, because Event.read_date 
+    cannot add month spans to them.
+    """
+    eventStart = datetime(rnd.randrange(1900, 2000), rnd.randrange(1, 13), rnd.randrange(1, 29),
+                          rnd.randrange(24), rnd.randrange(60))
+    return int((eventStart - datetime.min).total_seconds())
+
+
+def write_aeonzip(filePath: str, **sizes):
+    """Write a synthetic .aeonzip project file.
+    
+    Positional arguments:
+        filePath -- str: Path of the project file.
+    
+    Optional arguments: see generate_timeline().
+    """
+    jsonStr = json.dumps(generate_timeline(**sizes))
+    with zipfile.ZipFile(filePath, 'w', compression=zipfile.ZIP_DEFLATED) as myzip:
+        myzip.writestr('timeline.json', jsonStr)
+
+
+def add_size_arguments(parser):
+    """Add the timeline size options to an argparse parser."""
+    parser.add_argument('--entities', metavar='N', type=int, default=1000)
+    parser.add_argument('--events', metavar='N', type=int, default=10000)
+    parser.add_argument('--types', metavar='N', type=int, default=4)
+    parser.add_argument('--roles', metavar='N', type=int, default=3,
+                        help='Number of roles per entity type.')
+    parser.add_argument('--properties', metavar='N', type=int, default=4)
+    parser.add_argument('--tags', metavar='N', type=int, default=20)
+    parser.add_argument('--relationships', metavar='N', type=int, default=3,
+                        help='Number of relationships per event.')
+    parser.add_argument('--undated', metavar='N', type=int, default=10,
+                        help='Number of events without a date.')
+    parser.add_argument('--seed', metavar='N', type=int, default=0)
+
+
+def get_sizes(args) -> dict:
+    """Return the timeline size options of parsed arguments as a dictionary."""
+    return dict(
+        entities=args.entities,
+        events=args.events,
+        types=args.types,
+        roles=args.roles,
+        properties=args.properties,
+        tags=args.tags,
+        relationships=args.relationships,
+        undated=args.undated,
+        seed=args.seed,
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic Aeon Timeline 2 project.')
+    parser.add_argument('targetPath', metavar='Targetfile', help='The path of the .aeonzip file to write.')
+    add_size_arguments(parser)
+    args = parser.parse_args()
+    write_aeonzip(args.targetPath, **get_sizes(args))